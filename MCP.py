@@ -1,23 +1,36 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.graph_objects as go
-import plotly.express as px
 from datetime import datetime, timedelta
+import argparse
+import asyncio
+from bisect import bisect_left
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager, nullcontext
+from itertools import islice
+import http.client
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 import json
+import multiprocessing
+import os
+import queue
+import threading
 import time
 import random
-from typing import Dict, List, Any
-
-# Page configuration
-st.set_page_config(
-    page_title="MCP Business Assistant",
-    page_icon="🤖",
-    layout="wide",
-    initial_sidebar_state="expanded"
-)
-
-# Custom CSS
-st.markdown("""
+import re
+import sqlite3
+import sys
+from urllib.parse import parse_qs, urlencode, urlsplit
+from types import MappingProxyType
+import uuid
+import weakref
+from typing import Dict, List, Any, Iterator, Tuple
+
+# Custom CSS, injected by setup_page()
+CUSTOM_CSS = """
 <style>
     .main-header {
         background: linear-gradient(90deg, #667eea 0%, #764ba2 100%);
@@ -73,18 +86,1659 @@ st.markdown("""
         border: 1px solid #dee2e6;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+# Seconds a single tool fetch may take before the report is built without it
+DEFAULT_TOOL_DEADLINE = 2.0
+# Seconds the manager waits for its first fetch of every tool before starting without the slow ones
+STARTUP_FETCH_DEADLINE = 10.0
+
+# Tools each report reads, so process_query can fetch them all at once
+REPORT_TOOLS = {
+    'executive': ['asana', 'quickbooks', 'zendesk', 'google_analytics'],
+    'project': ['asana'],
+    'financial': ['quickbooks'],
+    'team': ['asana', 'google_calendar'],
+    'support': ['zendesk'],
+    # Trends read the metric history store rather than live tool data
+    'trend': [],
+    'general': []
+}
+
+# Data versions a report can change with; reports not listed read only the snapshot
+DATA_SOURCES = ('snapshot', 'aggregates', 'metrics')
+REPORT_SOURCES = {
+    'executive': ('snapshot', 'aggregates'),
+    'financial': ('snapshot', 'aggregates'),
+    'trend': ('metrics',),
+    'general': ()
+}
+
+# Look-back windows compared against the latest value in trend reports
+TREND_WINDOWS = {'1d': 86400, '7d': 7 * 86400, '30d': 30 * 86400, '90d': 90 * 86400}
+
+# Histogram bucket upper bounds in seconds, shared by every timing series
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram; recording is one bisect and three additions"""
+    
+    __slots__ = ('counts', 'total', 'count')
+    
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+    
+    def observe(self, seconds: float):
+        self.counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+    
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile by interpolating inside the bucket that holds it"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = LATENCY_BUCKETS[index - 1] if index else 0.0
+                upper = LATENCY_BUCKETS[index] if index < len(LATENCY_BUCKETS) else LATENCY_BUCKETS[-1]
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return LATENCY_BUCKETS[-1]
+
+class PerfRecorder:
+    """Latency histograms per (stage, label), e.g. ('fetch', 'asana') or ('report', 'executive')
+    
+    Stages are routing, fetch (a cached tool read), connector (an upstream
+    fetch), report (building one intent's report, including waiting on its
+    tools) and rerun (one Streamlit script run). Only a `sample_rate`
+    fraction of spans is timed; at 0 a span costs a single comparison.
+    """
+    
+    def __init__(self, sample_rate: float = 1.0):
+        self.sample_rate = sample_rate
+        # The rate to go back to when recording is switched back on
+        self.configured_rate = sample_rate
+        self._histograms = {}
+        self._lock = threading.Lock()
+    
+    def set_recording(self, recording: bool):
+        """Pause timing, or resume it at the configured rate (every span if that was 0)"""
+        self.sample_rate = (self.configured_rate or 1.0) if recording else 0.0
+    
+    def sampled(self) -> bool:
+        rate = self.sample_rate
+        return rate >= 1.0 or (rate > 0.0 and random.random() < rate)
+    
+    def observe(self, stage: str, label: str, seconds: float):
+        key = (stage, label)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = LatencyHistogram()
+            histogram.observe(seconds)
+    
+    @contextmanager
+    def _timed(self, stage: str, label: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, label, time.perf_counter() - start)
+    
+    def span(self, stage: str, label: str = ''):
+        """Context manager timing one stage, or a no-op when this span isn't sampled"""
+        return self._timed(stage, label) if self.sampled() else nullcontext()
+    
+    def reset(self):
+        with self._lock:
+            self._histograms = {}
+    
+    def snapshot(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            items = sorted(self._histograms.items())
+            return [{
+                'stage': stage,
+                'label': label,
+                'count': histogram.count,
+                'mean_ms': round(histogram.total / histogram.count * 1000, 3),
+                'p50_ms': round(histogram.quantile(0.50) * 1000, 3),
+                'p95_ms': round(histogram.quantile(0.95) * 1000, 3),
+                'p99_ms': round(histogram.quantile(0.99) * 1000, 3)
+            } for (stage, label), histogram in items if histogram.count]
+    
+    def export_json(self) -> str:
+        return json.dumps({'sample_rate': self.sample_rate, 'series': self.snapshot()})
+    
+    def export_prometheus(self) -> str:
+        """Prometheus text exposition format (one histogram family)"""
+        lines = ["# HELP mcp_stage_latency_seconds Latency of MCP assistant hot-path stages",
+                 "# TYPE mcp_stage_latency_seconds histogram"]
+        with self._lock:
+            items = sorted((key, list(h.counts), h.total, h.count) for key, h in self._histograms.items())
+        for (stage, label), counts, total, count in items:
+            labels = f'stage="{stage}",label="{label}"'
+            cumulative = 0
+            for bound, bucket_count in zip(LATENCY_BUCKETS, counts):
+                cumulative += bucket_count
+                lines.append(f'mcp_stage_latency_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'mcp_stage_latency_seconds_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f'mcp_stage_latency_seconds_sum{{{labels}}} {total}')
+            lines.append(f'mcp_stage_latency_seconds_count{{{labels}}} {count}')
+        return "\n".join(lines) + "\n"
+
+# Largest page a connector asks for; bulk fetches walk the pages at this size
+MAX_PAGE_SIZE = 500
+
+# Calls in flight to one upstream at a time, and the circuit breaker settings guarding it
+CONNECTOR_CONCURRENCY = 4
+BREAKER_THRESHOLD = 5
+BREAKER_RESET_SECONDS = 30.0
+
+class ConnectionPool:
+    """Bounded pool of keep-alive HTTP connections to one backend host"""
+    
+    def __init__(self, base_url: str, max_size: int = 8, timeout: float = 5.0):
+        parsed = urlsplit(base_url)
+        self.host = parsed.hostname
+        self.port = parsed.port
+        self.scheme = parsed.scheme or 'http'
+        self.base_path = parsed.path.rstrip('/')
+        self.timeout = timeout
+        self._idle = queue.LifoQueue(maxsize=max_size)
+        self._lock = threading.Lock()
+        self.stats = {'connections_opened': 0, 'requests': 0, 'reused': 0}
+    
+    def _new_connection(self):
+        conn_class = http.client.HTTPSConnection if self.scheme == 'https' else http.client.HTTPConnection
+        with self._lock:
+            self.stats['connections_opened'] += 1
+        return conn_class(self.host, self.port, timeout=self.timeout)
+    
+    def _checkout(self):
+        try:
+            conn = self._idle.get_nowait()
+            with self._lock:
+                self.stats['reused'] += 1
+            return conn
+        except queue.Empty:
+            return self._new_connection()
+    
+    def _checkin(self, conn):
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+    
+    def get_json(self, path: str, params: Dict[str, Any] = None):
+        """GET a JSON document, reusing an idle connection when one is free"""
+        url = self.base_path + path
+        if params:
+            url += '?' + urlencode(params)
+        
+        conn = self._checkout()
+        for attempt in range(2):
+            try:
+                conn.request('GET', url, headers={'Connection': 'keep-alive', 'Accept': 'application/json'})
+                response = conn.getresponse()
+                body = response.read()
+                break
+            except (http.client.HTTPException, ConnectionError, OSError):
+                # The server may have dropped an idle keep-alive socket; retry once on a fresh one
+                conn.close()
+                if attempt:
+                    raise
+                conn = self._new_connection()
+        
+        with self._lock:
+            self.stats['requests'] += 1
+        if response.will_close:
+            conn.close()
+        else:
+            self._checkin(conn)
+        
+        if response.status != 200:
+            raise ConnectionError(f"GET {url} returned HTTP {response.status}")
+        return json.loads(body)
+    
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+class MCPConnector:
+    """Fetches one tool's payload from its backend
+    
+    List-valued fields named in `paginated` are fetched page by page so a
+    backend never has to ship them in one response.
+    """
+    
+    tool_id = None
+    paginated = ()
+    
+    def fetch(self) -> Dict[str, Any]:
+        raise NotImplementedError
+    
+    def fetch_page(self, key: str, offset: int = 0, limit: int = MAX_PAGE_SIZE) -> Dict[str, Any]:
+        """Return {'items', 'total', 'next_offset'} for one page of a paginated field"""
+        raise NotImplementedError
+    
+    def fetch_all(self, key: str, page_size: int = MAX_PAGE_SIZE) -> List[Any]:
+        """Bulk-fetch every item of a paginated field"""
+        items, offset = [], 0
+        while offset is not None:
+            page = self.fetch_page(key, offset, page_size)
+            items.extend(page['items'])
+            offset = page['next_offset']
+        return items
+    
+    def close(self):
+        pass
+
+class MockConnector(MCPConnector):
+    """Serves a tool payload from memory, as the prototype always has"""
+    
+    def __init__(self, tool_id: str, payload: Dict[str, Any]):
+        self.tool_id = tool_id
+        self.payload = payload
+        self.paginated = tuple(key for key, value in payload.items() if isinstance(value, list))
+    
+    def fetch(self):
+        return self.payload
+    
+    def fetch_page(self, key, offset=0, limit=MAX_PAGE_SIZE):
+        items = self.payload.get(key, [])
+        end = offset + limit
+        return {'items': items[offset:end], 'total': len(items), 'next_offset': end if end < len(items) else None}
+
+class HTTPConnector(MCPConnector):
+    """Fetches a tool payload over pooled keep-alive HTTP
+    
+    The backend serves the scalar fields at `/<tool_id>` and each paginated
+    field at `/<tool_id>/<field>?offset=&limit=`.
+    """
+    
+    def __init__(self, base_url: str, pool_size: int = 8, timeout: float = 5.0):
+        self.pool = ConnectionPool(base_url, max_size=pool_size, timeout=timeout)
+    
+    def fetch(self):
+        payload = self.pool.get_json(f"/{self.tool_id}")
+        for key in self.paginated:
+            payload[key] = self.fetch_all(key)
+        return payload
+    
+    def fetch_page(self, key, offset=0, limit=MAX_PAGE_SIZE):
+        return self.pool.get_json(f"/{self.tool_id}/{key}", {'offset': offset, 'limit': limit})
+    
+    def close(self):
+        self.pool.close()
+
+class AsanaConnector(HTTPConnector):
+    tool_id = 'asana'
+    paginated = ('projects',)
+
+class GoogleAnalyticsConnector(HTTPConnector):
+    tool_id = 'google_analytics'
+    paginated = ('top_pages',)
+
+class QuickBooksConnector(HTTPConnector):
+    tool_id = 'quickbooks'
+
+class ZendeskConnector(HTTPConnector):
+    tool_id = 'zendesk'
+    paginated = ('tickets',)
+
+class GoogleCalendarConnector(HTTPConnector):
+    tool_id = 'google_calendar'
+
+class HootsuiteConnector(HTTPConnector):
+    tool_id = 'hootsuite'
+
+class HubSpotConnector(HTTPConnector):
+    tool_id = 'hubspot'
+
+class SlackConnector(HTTPConnector):
+    tool_id = 'slack'
+
+CONNECTOR_CLASSES = {
+    connector.tool_id: connector
+    for connector in (AsanaConnector, GoogleAnalyticsConnector, QuickBooksConnector, ZendeskConnector,
+                      GoogleCalendarConnector, HootsuiteConnector, HubSpotConnector, SlackConnector)
+}
+
+class _MockHTTPServer(ThreadingHTTPServer):
+    # Deep accept backlog so a burst of simultaneous clients queues instead of timing out
+    request_queue_size = 1024
+    daemon_threads = True
+
+class MockToolServer:
+    """Local stand-in backend serving the mock payloads over HTTP/1.1
+    
+    `scale` repeats every list field so connectors can be exercised against
+    payloads far larger than the built-in sample. `latency` delays every
+    response, tools in `slow` wait that many seconds more, and tools in
+    `failing` answer 503, to simulate a slow or broken upstream.
+    """
+    
+    def __init__(self, payloads: Dict[str, Dict[str, Any]], scale: int = 1, host: str = '127.0.0.1', port: int = 0,
+                 latency: float = 0.0):
+        self.payloads = {
+            tool_id: {key: value * scale if isinstance(value, list) else value for key, value in payload.items()}
+            for tool_id, payload in payloads.items()
+        }
+        self.latency = latency
+        self.slow = {}
+        self.failing = set()
+        self.request_count = 0
+        self._count_lock = threading.Lock()
+        self._server = _MockHTTPServer((host, port), self._make_handler())
+        self._thread = None
+    
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    def _make_handler(self):
+        server = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Headers and body go out as separate writes; don't let Nagle hold the body back
+            disable_nagle_algorithm = True
+            
+            def do_GET(self):
+                with server._count_lock:
+                    server.request_count += 1
+                parsed = urlsplit(self.path)
+                parts = [part for part in parsed.path.split('/') if part]
+                payload = server.payloads.get(parts[0]) if parts else None
+                
+                delay = server.latency + (server.slow.get(parts[0], 0.0) if parts else 0.0)
+                if delay:
+                    time.sleep(delay)
+                if parts and parts[0] in server.failing:
+                    return self._send(503, {'error': 'unavailable'})
+                if payload is None or len(parts) > 2:
+                    return self._send(404, {'error': 'not found'})
+                
+                if len(parts) == 1:
+                    body = {key: value for key, value in payload.items() if not isinstance(value, list)}
+                    return self._send(200, body)
+                
+                items = payload.get(parts[1])
+                if not isinstance(items, list):
+                    return self._send(404, {'error': 'not a paginated field'})
+                
+                query = parse_qs(parsed.query)
+                offset = int(query.get('offset', [0])[0])
+                limit = min(int(query.get('limit', [MAX_PAGE_SIZE])[0]), MAX_PAGE_SIZE)
+                end = offset + limit
+                self._send(200, {'items': items[offset:end], 'total': len(items),
+                                 'next_offset': end if end < len(items) else None})
+            
+            def _send(self, status, body):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+            
+            def log_message(self, format, *args):
+                pass
+        
+        return Handler
+    
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="mcp-mock-server", daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key into one execution
+    
+    The first caller runs the function; callers arriving while it is still
+    in flight wait for it and get the same result or exception. Once it
+    finishes the key is free again, so later calls fetch afresh.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+        self.counters = {'calls': 0, 'shared': 0}
+    
+    def do(self, key, function, *args):
+        with self._lock:
+            self.counters['calls'] += 1
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = Future()
+            else:
+                self.counters['shared'] += 1
+        if not leader:
+            return flight.result()
+        
+        try:
+            result = function(*args)
+        except BaseException as error:
+            flight.set_exception(error)
+            raise
+        else:
+            flight.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._flights[key]
+
+class CircuitOpenError(ConnectionError):
+    """Raised instead of calling an upstream whose circuit breaker is open"""
+
+class CircuitBreaker:
+    """Stops calling an upstream after repeated failures, so callers fail fast instead of piling on
+    
+    After `threshold` consecutive failures the circuit opens and every call
+    raises CircuitOpenError for `reset_after` seconds. Then one trial call
+    is let through (half-open): success closes the circuit, failure opens
+    it again.
+    """
+    
+    def __init__(self, threshold: int = 5, reset_after: float = 30.0):
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+        self.counters = {'rejected': 0, 'opened': 0}
+    
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return 'closed'
+        return 'half-open' if time.monotonic() - self.opened_at >= self.reset_after else 'open'
+    
+    @contextmanager
+    def guard(self):
+        """Wrap one upstream call; raises CircuitOpenError without running it while the circuit is open"""
+        with self._lock:
+            state = self.state
+            if state == 'open' or (state == 'half-open' and self._trial):
+                self.counters['rejected'] += 1
+                raise CircuitOpenError(f"circuit open after {self.failures} consecutive failures")
+            self._trial = state == 'half-open'
+        
+        try:
+            yield
+        except Exception:
+            with self._lock:
+                self.failures += 1
+                if self._trial or self.failures >= self.threshold:
+                    if self.opened_at is None or self._trial:
+                        self.counters['opened'] += 1
+                    self.opened_at = time.monotonic()
+                self._trial = False
+            raise
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+# Record-list fields kept as columnar frames, with the columns stored as categoricals
+COLUMNAR_FIELDS = {
+    ('asana', 'projects'): ['status'],
+    ('asana', 'team_workload'): ['availability'],
+    ('zendesk', 'tickets'): ['priority', 'status']
+}
+
+# Columns the reports and dashboard read, given to a table that arrives with no rows
+COLUMNAR_COLUMNS = {
+    ('asana', 'projects'): ['name', 'status', 'progress', 'due_date'],
+    ('asana', 'team_workload'): ['utilization', 'availability'],
+    ('zendesk', 'tickets'): ['id', 'client', 'subject', 'priority', 'status', 'created_at']
+}
+
+PROJECT_STATUS_EMOJI = {'On Track': '🟢', 'Behind Schedule': '🟡'}
+WORKLOAD_EMOJI = {'Overloaded': '🔴', 'Busy': '🟡'}
+TICKET_PRIORITY_EMOJI = {'High': '🔴', 'Medium': '🟡'}
+
+def to_columnar(tool_id: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a tool payload's record lists into DataFrames with categorical columns
+    
+    team_workload arrives keyed by member name and becomes a frame indexed by member.
+    Fields with a ranker also get their ranked row order as `<field>_rank`,
+    and calendars an AvailabilityIndex of everyone's busy time as `busy_index`.
+    """
+    columnar = dict(payload)
+    for (table_tool, field), categoricals in COLUMNAR_FIELDS.items():
+        records = payload.get(field) if table_tool == tool_id else None
+        if records is None or isinstance(records, pd.DataFrame):
+            continue
+        if isinstance(records, dict):
+            frame = pd.DataFrame.from_dict(records, orient='index')
+            frame.index.name = 'member'
+        else:
+            frame = pd.DataFrame.from_records(records)
+        if not len(frame):
+            frame = frame.reindex(columns=COLUMNAR_COLUMNS[(table_tool, field)])
+        for column in categoricals:
+            if column in frame:
+                frame[column] = frame[column].astype('category')
+        columnar[field] = frame
+        ranker = RANKERS.get((tool_id, field))
+        if ranker is not None:
+            columnar[f"{field}_rank"] = ranker(frame) if len(frame) else np.arange(0)
+    if tool_id == 'google_calendar' and 'availability' in payload and 'busy_index' not in payload:
+        columnar['busy_index'] = AvailabilityIndex.from_calendar(payload['availability'], payload.get('busy'))
+    return columnar
+
+def payloads_equal(a: Dict[str, Any], b: Dict[str, Any]) -> bool:
+    if a is b:
+        return True
+    if a.keys() != b.keys():
+        return False
+    for key, value in a.items():
+        other = b[key]
+        if isinstance(value, pd.DataFrame) or isinstance(other, pd.DataFrame):
+            if not (isinstance(value, pd.DataFrame) and isinstance(other, pd.DataFrame) and value.equals(other)):
+                return False
+        elif isinstance(value, np.ndarray) or isinstance(other, np.ndarray):
+            if not np.array_equal(value, other):
+                return False
+        elif value != other:
+            return False
+    return True
+
+def label_column(values: pd.Series, labels: Dict[str, str], default: str) -> pd.Series:
+    """Vectorized lookup of a display label (e.g. an emoji) for every row"""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        # One lookup per category, then a single take over the integer codes; code -1 (NaN) hits the default
+        table = np.array([labels.get(category, default) for category in values.cat.categories] + [default], dtype=object)
+        return pd.Series(table[values.cat.codes.to_numpy()], index=values.index, dtype=object)
+    return values.map(labels).fillna(default)
+
+# Urgency order for ranked ticket listings; priorities not listed rank after these
+TICKET_PRIORITY_RANK = {'High': 0, 'Medium': 1, 'Low': 2}
+
+def rank_tickets(tickets: pd.DataFrame) -> np.ndarray:
+    """Row positions of tickets, most urgent first: by priority, then oldest first"""
+    priority = label_column(tickets['priority'], TICKET_PRIORITY_RANK, len(TICKET_PRIORITY_RANK)).to_numpy(np.int64)
+    if 'created_at' in tickets:
+        age = pd.to_datetime(tickets['created_at'], errors='coerce').to_numpy()
+    else:
+        # Without timestamps, upstream order (oldest first) stands in for age
+        age = np.arange(len(tickets))
+    return np.lexsort((age, priority))
+
+def rank_projects(projects: pd.DataFrame) -> np.ndarray:
+    """Row positions of projects, most behind first: earliest due date, then least progress"""
+    due = pd.to_datetime(projects['due_date'], errors='coerce').to_numpy()
+    return np.lexsort((projects['progress'].to_numpy(), due))
+
+# Row orders precomputed once per payload, stored next to the field as `<field>_rank`
+RANKERS = {('zendesk', 'tickets'): rank_tickets, ('asana', 'projects'): rank_projects}
+# Reports that list a ranked field, one page at a time
+RANKED_LISTS = {'support': ('zendesk', 'tickets'), 'project': ('asana', 'projects')}
+REPORT_PAGE_SIZE = 10
+
+# Working hours that free slots are searched within, and how loose availability strings map onto them
+WORKDAY_HOURS = (9, 18)
+DAY_PARTS = {'morning': (9, 12), 'afternoon': (12, 18)}
+
+AVAILABILITY_PATTERNS = [
+    (re.compile(r"busy until (\d{1,2})(?::(\d\d))?\s*(am|pm)"), 'until'),
+    (re.compile(r"available after (\d{1,2})(?::(\d\d))?\s*(am|pm)"), 'until'),
+    (re.compile(r"busy (\d{1,2})(?::(\d\d))?\s*(am|pm)?\s*-\s*(\d{1,2})(?::(\d\d))?\s*(am|pm)"), 'between'),
+    (re.compile(r"free all day"), 'free'),
+    (re.compile(r"busy all day"), 'busy')
+]
+
+def _clock(hour: str, minute: str, meridiem: str) -> int:
+    """Minutes after midnight of a 12-hour clock time"""
+    return (int(hour) % 12 + (12 if meridiem == 'pm' else 0)) * 60 + int(minute or 0)
+
+def parse_availability(text: str) -> List[Tuple[int, int]]:
+    """Busy intervals, in minutes after midnight, described by a calendar availability string
+    
+    Understands "Busy until 3 PM", "Available after 11 AM", "Busy 2-4 PM",
+    "Free all day" and "Busy all day". Anything else counts as busy for
+    the whole workday, so an unreadable status never offers a false slot.
+    """
+    day_start, day_end = WORKDAY_HOURS[0] * 60, WORKDAY_HOURS[1] * 60
+    text = text.strip().lower()
+    for pattern, kind in AVAILABILITY_PATTERNS:
+        match = pattern.fullmatch(text)
+        if match is None:
+            continue
+        if kind == 'free':
+            return []
+        if kind == 'until':
+            start, end = day_start, _clock(*match.groups())
+        elif kind == 'between':
+            start_hour, start_minute, start_meridiem, end_hour, end_minute, end_meridiem = match.groups()
+            end = _clock(end_hour, end_minute, end_meridiem)
+            start = _clock(start_hour, start_minute, start_meridiem or end_meridiem)
+            # "Busy 11-1 PM" starts in the morning
+            if start > end and not start_meridiem:
+                start -= 720
+            if start > end:
+                break
+        else:
+            break
+        # Clipped to the workday, so "Busy until 8 AM" leaves all of it free
+        start, end = max(start, day_start), min(end, day_end)
+        return [(start, end)] if start < end else []
+    return [(day_start, day_end)]
+
+def _minutes(values) -> np.ndarray:
+    """Datetimes (or ISO strings) as int64 minutes since the epoch"""
+    return pd.to_datetime(values).to_numpy().astype('datetime64[m]').astype(np.int64)
+
+class AvailabilityIndex:
+    """Busy intervals of every team member, merged and packed into sorted arrays
+    
+    Times are minutes since the epoch. Each interval is keyed as
+    member * KEY_STRIDE + minute; after merging overlaps a member's
+    intervals are disjoint, so both the start and the end keys form one
+    globally sorted array. A free-slot query is then two searchsorted
+    calls over all members at once plus a pass over just the intervals
+    inside the query window, whatever the calendar length.
+    """
+    
+    KEY_STRIDE = 1 << 32
+    
+    def __init__(self, members: List[str], member_ids: np.ndarray, starts: np.ndarray, ends: np.ndarray):
+        self.members = list(members)
+        self.positions = {member: index for index, member in enumerate(self.members)}
+        order = np.lexsort((starts, member_ids))
+        start_keys = member_ids[order] * self.KEY_STRIDE + starts[order]
+        end_keys = member_ids[order] * self.KEY_STRIDE + ends[order]
+        if len(order):
+            # An interval opens a new block unless it starts before the furthest end seen so far
+            reach = np.maximum.accumulate(end_keys)
+            heads = np.flatnonzero(np.concatenate(([True], start_keys[1:] > reach[:-1])))
+            start_keys, end_keys = start_keys[heads], np.maximum.reduceat(end_keys, heads)
+        self.start_keys = start_keys
+        self.end_keys = end_keys
+    
+    @classmethod
+    def from_calendar(cls, availability: Dict[str, str], busy: Dict[str, List[List[str]]] = None,
+                      day: datetime = None) -> 'AvailabilityIndex':
+        """Index today's availability strings plus any explicit `busy` [start, end] pairs per member"""
+        day = (day or datetime.now()).replace(hour=0, minute=0, second=0, microsecond=0)
+        midnight = int(_minutes([day])[0])
+        members = list(dict.fromkeys([*availability, *(busy or {})]))
+        positions = {member: index for index, member in enumerate(members)}
+        ids, starts, ends = [], [], []
+        for member, text in availability.items():
+            for start, end in parse_availability(text):
+                ids.append(positions[member])
+                starts.append(midnight + start)
+                ends.append(midnight + end)
+        member_ids = np.array(ids, dtype=np.int64)
+        starts, ends = np.array(starts, dtype=np.int64), np.array(ends, dtype=np.int64)
+        if busy:
+            counts = [len(intervals) for intervals in busy.values()]
+            pairs = [pair for intervals in busy.values() for pair in intervals]
+            if pairs:
+                member_ids = np.concatenate((member_ids, np.repeat([positions[member] for member in busy], counts)))
+                starts = np.concatenate((starts, _minutes([pair[0] for pair in pairs])))
+                ends = np.concatenate((ends, _minutes([pair[1] for pair in pairs])))
+        return cls(members, member_ids, starts, ends)
+    
+    def __eq__(self, other):
+        return (isinstance(other, AvailabilityIndex) and self.members == other.members
+                and np.array_equal(self.start_keys, other.start_keys) and np.array_equal(self.end_keys, other.end_keys))
+    
+    def __len__(self):
+        return len(self.start_keys)
+    
+    def earliest_slots(self, start: datetime, end: datetime, minutes: int) -> np.ndarray:
+        """First free minute of a `minutes`-long gap in [start, end) for every member, -1 where none fits"""
+        window_start, window_end = (int(value) for value in _minutes([start, end]))
+        base = np.arange(len(self.members), dtype=np.int64) * self.KEY_STRIDE
+        # Intervals overlapping the window: ending after its start and starting before its end
+        first = np.searchsorted(self.end_keys, base + window_start, 'right')
+        last = np.searchsorted(self.start_keys, base + window_end, 'left')
+        counts = np.maximum(last - first, 0)
+        
+        # Each member has counts + 1 gaps: window start -> 1st interval -> ... -> last interval -> window end
+        gap_offsets = np.cumsum(counts + 1) - (counts + 1)
+        gap_starts = np.full(len(base) + counts.sum(), window_start, dtype=np.int64)
+        gap_ends = np.full(len(gap_starts), window_end, dtype=np.int64)
+        owner = np.repeat(np.arange(len(base)), counts)
+        local = np.arange(len(owner)) - np.repeat(np.cumsum(counts) - counts, counts)
+        positions = first[owner] + local
+        gap_ends[gap_offsets[owner] + local] = self.start_keys[positions] - base[owner]
+        gap_starts[gap_offsets[owner] + local + 1] = self.end_keys[positions] - base[owner]
+        
+        gap_starts = np.maximum(gap_starts, window_start)
+        fits = np.minimum(gap_ends, window_end) - gap_starts >= minutes
+        candidates = np.where(fits, gap_starts, np.iinfo(np.int64).max)
+        earliest = np.minimum.reduceat(candidates, gap_offsets) if len(base) else candidates
+        return np.where(earliest == np.iinfo(np.int64).max, -1, earliest)
+    
+    def best_assignees(self, start: datetime, end: datetime, minutes: int, utilization: pd.Series = None,
+                       max_utilization: float = None, limit: int = 5) -> pd.DataFrame:
+        """Members with a free `minutes` slot in [start, end), least utilized first, then earliest slot
+        
+        `utilization` is indexed by member (Asana's team_workload); members
+        missing from it only qualify when no `max_utilization` is given.
+        """
+        slots = self.earliest_slots(start, end, minutes)
+        load = (utilization.reindex(self.members) if utilization is not None
+                else pd.Series(np.nan, index=self.members)).to_numpy(np.float64)
+        eligible = slots >= 0
+        if max_utilization is not None:
+            eligible &= load < max_utilization
+        candidates = np.flatnonzero(eligible)
+        chosen = candidates[np.lexsort((slots[candidates], load[candidates]))[:limit]]
+        return pd.DataFrame({
+            'member': [self.members[index] for index in chosen],
+            'slot': slots[chosen].astype('datetime64[m]'),
+            'utilization': load[chosen]
+        })
+
+SLOT_DURATION_PATTERN = re.compile(r"\b(\d+(?:\.\d+)?|an?|one|half an?)\s*(hours?|hrs?|h|minutes?|mins?)\b")
+SLOT_UTILIZATION_PATTERN = re.compile(r"(?:\b(?:under|below|less than)|<)\s*(\d+(?:\.\d+)?)\s*%")
+# A duration only asks for a slot next to one of these; "the last 24 hours" is a time range
+SLOT_CUE_PATTERN = re.compile(r"\b(?:free|slots?|assign\w*|available)\b")
+WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+
+def parse_slot_request(query: str, now: datetime = None):
+    """(start, end, minutes, max_utilization) for "who is free for 2 hours tomorrow afternoon under 80%"
+    
+    Returns None unless the query names a duration and asks for someone
+    free, available, a slot or an assignee. The window is one
+    workday (or its morning/afternoon) today, tomorrow or on the next
+    named weekday; today's window never starts in the past, and once it
+    is over the request moves to the next workday (or, for a named
+    weekday, to the same day next week).
+    """
+    text = query.lower()
+    duration = SLOT_DURATION_PATTERN.search(text)
+    if duration is None or SLOT_CUE_PATTERN.search(text) is None:
+        return None
+    amount, unit = duration.groups()
+    amount = {'a': 1, 'an': 1, 'one': 1, 'half a': 0.5, 'half an': 0.5}.get(amount) or float(amount)
+    minutes = int(round(amount * (1 if unit.startswith('m') else 60)))
+    
+    now = (now or datetime.now()).replace(second=0, microsecond=0)
+    days_ahead, named = 0, False
+    if 'tomorrow' in text:
+        days_ahead = 1
+    else:
+        for index, weekday in enumerate(WEEKDAYS):
+            if weekday in text:
+                days_ahead, named = (index - now.weekday()) % 7, True
+                break
+    first_hour, last_hour = next((hours for part, hours in DAY_PARTS.items() if part in text), WORKDAY_HOURS)
+    day = now.replace(hour=0, minute=0) + timedelta(days=days_ahead)
+    if now >= day + timedelta(hours=last_hour):
+        day += timedelta(days=7 if named else 1)
+        # Saturday and Sunday are skipped unless asked for by name
+        while day.weekday() >= 5 and not named:
+            day += timedelta(days=1)
+    start = max(day + timedelta(hours=first_hour), now)
+    
+    utilization = SLOT_UTILIZATION_PATTERN.search(text)
+    return (start, day + timedelta(hours=last_hour), minutes,
+            float(utilization.group(1)) if utilization else None)
+
+# Tools whose payloads feed MaterializedAggregates
+AGGREGATE_TOOLS = ('asana', 'zendesk', 'quickbooks')
+
+def compute_aggregates(tool_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Full, vectorized recompute of the executive-summary counters from tool payloads"""
+    projects = tool_data.get('asana', {}).get('projects')
+    tickets = tool_data.get('zendesk', {}).get('tickets')
+    has_projects = projects is not None and len(projects)
+    has_tickets = tickets is not None and len(tickets)
+    return {
+        'project_count': len(projects) if has_projects else 0,
+        'progress_sum': int(projects['progress'].sum()) if has_projects else 0,
+        'projects_by_status': projects['status'].value_counts().to_dict() if has_projects else {},
+        'ticket_count': len(tickets) if has_tickets else 0,
+        'tickets_by_priority': tickets['priority'].value_counts().to_dict() if has_tickets else {},
+        'outstanding_invoices': tool_data.get('quickbooks', {}).get('outstanding_invoices', 0)
+    }
+
+class MaterializedAggregates:
+    """Executive-summary counters and sums kept current by change events
+    
+    Built once from a snapshot with a full recompute, then updated in O(1)
+    per event. Events are dicts with a `type` and an `id`:
+    ticket_created/ticket_priority_changed (priority), ticket_closed,
+    project_created (status, progress), project_progress_changed (progress),
+    project_status_changed (status), project_closed, invoice_issued
+    (amount) and invoice_paid (amount, optional for issued invoices).
+    Ticket events name a ticket by the `id` field of its Zendesk record,
+    projects by their name.
+    """
+    
+    def __init__(self, tool_data: Dict[str, Any] = None, version: int = 0):
+        self._lock = threading.Lock()
+        self.version = version
+        self.counters = {'applied': 0, 'ignored': 0}
+        
+        totals = compute_aggregates(tool_data or {})
+        self.progress_sum = totals['progress_sum']
+        self.projects_by_status = Counter({status: count for status, count in totals['projects_by_status'].items() if count})
+        self.tickets_by_priority = Counter({priority: count for priority, count in totals['tickets_by_priority'].items() if count})
+        self.outstanding_invoices = totals['outstanding_invoices']
+        
+        # Per-entity state, so an event can undo the old value it replaces
+        projects = (tool_data or {}).get('asana', {}).get('projects')
+        tickets = (tool_data or {}).get('zendesk', {}).get('tickets')
+        self.projects = {}
+        if projects is not None and len(projects):
+            self.projects = dict(zip(projects['name'].tolist(),
+                                     map(list, zip(projects['status'].astype(object).tolist(), projects['progress'].tolist()))))
+        self.tickets = {}
+        if tickets is not None and len(tickets):
+            # Tickets without an id still count, under keys no JSON event can name
+            ids = tickets['id'].tolist() if 'id' in tickets else [(None, row) for row in range(len(tickets))]
+            self.tickets = dict(zip(ids, tickets['priority'].astype(object).tolist()))
+        self.invoices = {}
+    
+    def apply(self, event: Dict[str, Any]) -> bool:
+        """Apply one change event; unknown types, unknown ids and malformed events are counted and skipped"""
+        handler = getattr(self, f"_on_{event.get('type')}", None) if isinstance(event, dict) else None
+        with self._lock:
+            try:
+                applied = handler is not None and handler(event) is not False
+            except (KeyError, TypeError):
+                # Handlers read every field before changing anything, so a bad event leaves no trace
+                applied = False
+            self.counters['applied' if applied else 'ignored'] += 1
+            if applied:
+                self.version += 1
+        return applied
+    
+    def _on_ticket_created(self, event):
+        ticket_id, priority = event['id'], event['priority']
+        if ticket_id in self.tickets:
+            return False
+        self.tickets_by_priority[priority] += 1
+        self.tickets[ticket_id] = priority
+    
+    def _on_ticket_priority_changed(self, event):
+        old, priority = self.tickets.get(event['id']), event['priority']
+        if old is None:
+            return False
+        self.tickets_by_priority[priority] += 1
+        self.tickets_by_priority[old] -= 1
+        self.tickets[event['id']] = priority
+    
+    def _on_ticket_closed(self, event):
+        old = self.tickets.pop(event['id'], None)
+        if old is None:
+            return False
+        self.tickets_by_priority[old] -= 1
+    
+    def _on_project_created(self, event):
+        project_id, status, progress = event['id'], event['status'], event['progress']
+        if project_id in self.projects:
+            return False
+        progress_sum = self.progress_sum + progress
+        self.projects_by_status[status] += 1
+        self.projects[project_id] = [status, progress]
+        self.progress_sum = progress_sum
+    
+    def _on_project_progress_changed(self, event):
+        project = self.projects.get(event['id'])
+        if project is None:
+            return False
+        self.progress_sum += event['progress'] - project[1]
+        project[1] = event['progress']
+    
+    def _on_project_status_changed(self, event):
+        project, status = self.projects.get(event['id']), event['status']
+        if project is None:
+            return False
+        self.projects_by_status[status] += 1
+        self.projects_by_status[project[0]] -= 1
+        project[0] = status
+    
+    def _on_project_closed(self, event):
+        project = self.projects.pop(event['id'], None)
+        if project is None:
+            return False
+        self.projects_by_status[project[0]] -= 1
+        self.progress_sum -= project[1]
+    
+    def _on_invoice_issued(self, event):
+        invoice_id, amount = event['id'], event['amount']
+        if invoice_id in self.invoices:
+            return False
+        self.outstanding_invoices += amount
+        self.invoices[invoice_id] = amount
+    
+    def _on_invoice_paid(self, event):
+        invoice_id = event['id']
+        amount = self.invoices.get(invoice_id, event.get('amount'))
+        if amount is None:
+            return False
+        self.outstanding_invoices -= amount
+        self.invoices.pop(invoice_id, None)
+    
+    def view(self) -> Dict[str, Any]:
+        """Consistent copy of the counters for one report"""
+        with self._lock:
+            return {
+                'version': self.version,
+                'project_count': len(self.projects),
+                'progress_sum': self.progress_sum,
+                'projects_by_status': dict(+self.projects_by_status),
+                'ticket_count': len(self.tickets),
+                'tickets_by_priority': dict(+self.tickets_by_priority),
+                'outstanding_invoices': self.outstanding_invoices
+            }
+
+class DataSnapshot:
+    """Immutable, versioned view of every tool's data
+    
+    Snapshots are shared by all sessions, so payloads must be treated as
+    read-only; changes are published as a new snapshot instead.
+    """
+    
+    __slots__ = ('version', 'data', 'created_at')
+    
+    def __init__(self, version: int, data: Dict[str, Any]):
+        self.version = version
+        self.data = MappingProxyType(dict(data))
+        self.created_at = datetime.now()
+    
+    def get(self, tool_id: str):
+        return self.data.get(tool_id, {})
+
+class SnapshotStore:
+    """Process-wide holder of the current DataSnapshot
+    
+    Readers grab `current` without locking; publishers build the next
+    snapshot off to the side and swap it in with a single assignment.
+    """
+    
+    def __init__(self, data: Dict[str, Any]):
+        self._lock = threading.Lock()
+        self._current = DataSnapshot(1, data)
+    
+    @property
+    def current(self) -> DataSnapshot:
+        return self._current
+    
+    def publish(self, updates: Dict[str, Any]) -> DataSnapshot:
+        """Swap in a new snapshot with `updates` replacing those tools' payloads"""
+        with self._lock:
+            data = dict(self._current.data)
+            data.update(updates)
+            self._current = DataSnapshot(self._current.version + 1, data)
+            return self._current
+
+# Seconds each tool's data stays fresh; fast-moving sources expire sooner
+TOOL_TTLS = {
+    'slack': 60,
+    'zendesk': 300,
+    'google_calendar': 300,
+    'asana': 600,
+    'google_analytics': 900,
+    'hootsuite': 900,
+    'hubspot': 3600,
+    'quickbooks': 86400
+}
+DEFAULT_TTL = 300
+
+class ToolDataCache:
+    """Bounded LRU cache of tool payloads with stale-while-revalidate reads
+    
+    Entries are keyed by (tool_id, scope); scope None is the whole payload,
+    anything else is passed to the loader as-is (e.g. one page of a list).
+    A stale entry is served immediately while a background reload runs.
+    """
+    
+    def __init__(self, loader, ttls: Dict[str, float] = None, max_entries: int = 256, on_refresh=None):
+        self.loader = loader
+        self.ttls = ttls or {}
+        self.max_entries = max_entries
+        self.on_refresh = on_refresh
+        self._entries = OrderedDict()
+        self._refreshing = set()
+        self._wanted = set()
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="mcp-revalidate")
+        self.counters = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'refreshes': 0, 'refresh_errors': 0, 'evictions': 0}
+    
+    def ttl(self, tool_id: str) -> float:
+        return self.ttls.get(tool_id, DEFAULT_TTL)
+    
+    def get(self, tool_id: str, scope=None):
+        key = (tool_id, scope)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                value, fetched_at = entry
+                if time.monotonic() - fetched_at < self.ttl(tool_id):
+                    self.counters['hits'] += 1
+                    return value
+                self.counters['stale_hits'] += 1
+            else:
+                self.counters['misses'] += 1
+        
+        if entry is not None:
+            self.revalidate(key)
+            return value
+        return self._load(key)
+    
+    def put(self, tool_id: str, value, scope=None):
+        with self._lock:
+            self._entries[(tool_id, scope)] = (value, time.monotonic())
+            self._entries.move_to_end((tool_id, scope))
+            self._wanted.discard((tool_id, scope))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.counters['evictions'] += 1
+    
+    def clear(self):
+        """Drop every entry, so the next read of each goes upstream"""
+        with self._lock:
+            self._entries.clear()
+    
+    def want(self, tool_id: str, scope=None):
+        """Keep reporting a key with no entry as due until a load of it succeeds"""
+        with self._lock:
+            if (tool_id, scope) not in self._entries:
+                self._wanted.add((tool_id, scope))
+    
+    def revalidate(self, key):
+        """Reload an entry in the background unless a reload is already running"""
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        self._pool.submit(self._background_load, key)
+    
+    def _background_load(self, key):
+        try:
+            self._load(key)
+        except Exception:
+            # Keep serving the stale value; the scheduler will try again
+            with self._lock:
+                self.counters['refresh_errors'] += 1
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+    
+    def _load(self, key):
+        tool_id, scope = key
+        value = self.loader(tool_id, scope)
+        self.put(tool_id, value, scope)
+        with self._lock:
+            self.counters['refreshes'] += 1
+        if self.on_refresh and scope is None:
+            self.on_refresh(tool_id, value)
+        return value
+    
+    def due(self, lead: float = 0.8) -> List[tuple]:
+        """Keys whose age has passed `lead` of their TTL, plus wanted keys never loaded"""
+        now = time.monotonic()
+        with self._lock:
+            return [key for key, (_, fetched_at) in self._entries.items()
+                    if now - fetched_at >= self.ttl(key[0]) * lead] + list(self._wanted)
+    
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            entries = [
+                {'tool': tool_id, 'scope': scope, 'age_seconds': round(now - fetched_at, 1), 'ttl_seconds': self.ttl(tool_id)}
+                for (tool_id, scope), (_, fetched_at) in self._entries.items()
+            ]
+            counters = dict(self.counters)
+            wanted = sorted(tool_id for tool_id, scope in self._wanted if scope is None)
+        reads = counters['hits'] + counters['stale_hits'] + counters['misses']
+        counters['hit_rate'] = round((counters['hits'] + counters['stale_hits']) / reads, 4) if reads else 0.0
+        counters['size'] = len(entries)
+        counters['entries'] = entries
+        counters['wanted'] = wanted
+        return counters
+
+class RefreshScheduler:
+    """Background thread that revalidates cache entries shortly before they expire"""
+    
+    def __init__(self, cache: ToolDataCache, lead: float = 0.8, interval: float = 1.0):
+        self.cache = cache
+        self.lead = lead
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            for key in self.cache.due(self.lead):
+                self.cache.revalidate(key)
+    
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="mcp-refresh-scheduler", daemon=True)
+            self._thread.start()
+        return self
+    
+    def stop(self):
+        self._stop.set()
+
+class ReportCache:
+    """Bounded LRU of finished reports, shared by every session
+    
+    Keys are (intents, connected-tool set, versions of the data those
+    intents read), so an entry can never be served against data it was
+    not built from; a new snapshot or change event simply makes the old
+    keys of the reports that read it unreachable until they age out.
+    """
+    
+    def __init__(self, max_entries: int = 128):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = {'hits': 0, 'misses': 0, 'evictions': 0}
+    
+    def get(self, key):
+        with self._lock:
+            report = self._entries.get(key)
+            if report is None:
+                self.counters['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.counters['hits'] += 1
+            return report
+    
+    def put(self, key, report: str):
+        with self._lock:
+            self._entries[key] = report
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.counters['evictions'] += 1
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self.counters)
+            counters['size'] = len(self._entries)
+        lookups = counters['hits'] + counters['misses']
+        counters['hit_rate'] = round(counters['hits'] / lookups, 4) if lookups else 0.0
+        return counters
+
+# Entries per page of the Query History panel
+HISTORY_PAGE_SIZE = 5
+
+class QueryHistory:
+    """One session's query history: a bounded ring buffer spilled to SQLite
+    
+    Only the newest `capacity` entries are held in memory. Every entry is
+    also written to SQLite, where older pages are read back on demand; the
+    database keeps at most `retain` entries per session. Opening a history
+    also prunes the whole file: entries older than `max_age_days` and all
+    but the newest `max_total` entries across sessions are deleted, so
+    abandoned sessions don't accumulate. The connection is closed by
+    close() or when the history is garbage collected. The app shares one
+    history per id across browser tabs (see get_query_history).
+    """
+    
+    def __init__(self, path: str = ':memory:', session_id: str = None, capacity: int = 20, retain: int = 1000,
+                 max_total: int = 100_000, max_age_days: float = 30):
+        self.session_id = session_id or uuid.uuid4().hex
+        self.capacity = capacity
+        self.retain = retain
+        self.max_total = max_total
+        self.max_age_days = max_age_days
+        self._recent = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        # Streamlit reruns a session on different threads; the lock serializes access
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._finalizer = weakref.finalize(self, self._db.close)
+        with self._db:
+            self._db.execute("CREATE TABLE IF NOT EXISTS query_history ("
+                             "id INTEGER PRIMARY KEY AUTOINCREMENT, session TEXT NOT NULL, "
+                             "query TEXT NOT NULL, result TEXT NOT NULL, timestamp TEXT NOT NULL)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS query_history_session ON query_history (session, id)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS query_history_timestamp ON query_history (timestamp)")
+        self.prune()
+        
+        # Resume a session that already has entries on disk
+        self._count = self._db.execute("SELECT COUNT(*) FROM query_history WHERE session = ?",
+                                       (self.session_id,)).fetchone()[0]
+        self._recent.extend(reversed(self._select(0, capacity)))
+    
+    def __len__(self) -> int:
+        return self._count
+    
+    @staticmethod
+    def _entry(row) -> Dict[str, Any]:
+        query, result, timestamp = row
+        return {'query': query, 'result': result, 'timestamp': datetime.fromisoformat(timestamp)}
+    
+    def _select(self, offset: int, limit: int) -> List[Dict[str, Any]]:
+        rows = self._db.execute("SELECT query, result, timestamp FROM query_history WHERE session = ? "
+                                "ORDER BY id DESC LIMIT ? OFFSET ?", (self.session_id, limit, offset))
+        return [self._entry(row) for row in rows]
+    
+    def append(self, query: str, result: str, timestamp: datetime = None) -> Dict[str, Any]:
+        entry = {'query': query, 'result': result, 'timestamp': timestamp or datetime.now()}
+        with self._lock, self._db:
+            self._db.execute("INSERT INTO query_history (session, query, result, timestamp) VALUES (?, ?, ?, ?)",
+                             (self.session_id, query, result, entry['timestamp'].isoformat()))
+            self._recent.append(entry)
+            self._count += 1
+            if self._count > self.retain:
+                self._db.execute("DELETE FROM query_history WHERE session = ? AND id <= "
+                                 "(SELECT id FROM query_history WHERE session = ? ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                                 (self.session_id, self.session_id, self.retain))
+                self._count = self.retain
+        return entry
+    
+    def prune(self, now: datetime = None) -> int:
+        """Delete expired entries of every session and trim the file to `max_total`; returns rows deleted"""
+        cutoff = (now or datetime.now()) - timedelta(days=self.max_age_days)
+        with self._lock, self._db:
+            deleted = self._db.execute("DELETE FROM query_history WHERE timestamp < ?", (cutoff.isoformat(),)).rowcount
+            deleted += self._db.execute("DELETE FROM query_history WHERE id <= "
+                                        "(SELECT id FROM query_history ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                                        (self.max_total,)).rowcount
+        return deleted
+    
+    def close(self):
+        self._finalizer()
+    
+    def latest(self):
+        return self._recent[-1] if self._recent else None
+    
+    def page(self, offset: int = 0, limit: int = 5) -> List[Dict[str, Any]]:
+        """Entries newest first; pages inside the ring buffer never touch SQLite"""
+        with self._lock:
+            if offset + limit <= len(self._recent):
+                return list(islice(reversed(self._recent), offset, offset + limit))
+            return self._select(offset, limit)
+
+# Rollup bucket widths in seconds, finest first; raw samples sit below them
+ROLLUP_RESOLUTIONS = {'minute': 60, 'hour': 3600, 'day': 86400}
+ROLLUP_FIELDS = ('count', 'sum', 'min', 'max')
+
+class MetricSeries:
+    """Append-only time series of one metric in memory-mapped column files
+    
+    The directory holds raw `time` (epoch seconds) and `value` columns plus
+    count/sum/min/max columns per rollup resolution, each a flat binary
+    array read through np.memmap. Times are strictly increasing, so a range
+    lookup is two binary searches and returns views of the mapped files.
+    Reads take the append lock, so they never see a `time` column that has
+    grown ahead of `value`.
+    """
+    
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        # Reentrant: append reads columns while holding it
+        self._lock = threading.RLock()
+        self._maps = {}
+    
+    @staticmethod
+    def _dtype(column: str):
+        return np.int64 if column.endswith(('time', 'count')) else np.float64
+    
+    def _path(self, column: str) -> str:
+        return os.path.join(self.directory, f"{column}.bin")
+    
+    def column(self, name: str) -> np.ndarray:
+        """Read-only map of one column, remapped when an append has grown the file"""
+        path = self._path(name)
+        with self._lock:
+            size = os.path.getsize(path) if os.path.exists(path) else 0
+            mapped = self._maps.get(name)
+            if mapped is None or mapped.nbytes != size:
+                mapped = np.memmap(path, dtype=self._dtype(name), mode='r') if size else np.empty(0, self._dtype(name))
+                self._maps[name] = mapped
+            return mapped
+    
+    def __len__(self) -> int:
+        return len(self.column('time'))
+    
+    def last_time(self):
+        times = self.column('time')
+        return int(times[-1]) if len(times) else None
+    
+    def _write(self, name: str, values: np.ndarray):
+        with open(self._path(name), 'ab') as column:
+            column.write(np.ascontiguousarray(values, dtype=self._dtype(name)).tobytes())
+    
+    def _overwrite_last(self, name: str, value):
+        with open(self._path(name), 'r+b') as column:
+            column.seek(-np.dtype(self._dtype(name)).itemsize, os.SEEK_END)
+            column.write(np.array([value], dtype=self._dtype(name)).tobytes())
+    
+    def append(self, times, values) -> int:
+        """Append samples in increasing time order and fold them into every rollup"""
+        times = np.asarray(times, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64)
+        if not len(times):
+            return 0
+        with self._lock:
+            last = self.last_time()
+            if (last is not None and times[0] <= last) or np.any(np.diff(times) <= 0):
+                raise ValueError("metric samples must be appended in increasing time order")
+            self._write('time', times)
+            self._write('value', values)
+            for resolution, width in ROLLUP_RESOLUTIONS.items():
+                self._roll_up(resolution, width, times, values)
+        return len(times)
+    
+    def _roll_up(self, resolution: str, width: int, times: np.ndarray, values: np.ndarray):
+        buckets = times - times % width
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        rollup = {
+            'time': buckets[starts],
+            'count': np.diff(np.r_[starts, len(times)]),
+            'sum': np.add.reduceat(values, starts),
+            'min': np.minimum.reduceat(values, starts),
+            'max': np.maximum.reduceat(values, starts)
+        }
+        
+        # A batch that starts inside the last stored bucket is merged into it in place
+        stored = self.column(f"{resolution}_time")
+        if len(stored) and stored[-1] == rollup['time'][0]:
+            merged = {
+                'count': self.column(f"{resolution}_count")[-1] + rollup['count'][0],
+                'sum': self.column(f"{resolution}_sum")[-1] + rollup['sum'][0],
+                'min': min(self.column(f"{resolution}_min")[-1], rollup['min'][0]),
+                'max': max(self.column(f"{resolution}_max")[-1], rollup['max'][0])
+            }
+            for field, value in merged.items():
+                self._overwrite_last(f"{resolution}_{field}", value)
+            rollup = {field: column[1:] for field, column in rollup.items()}
+        
+        for field, column in rollup.items():
+            self._write(f"{resolution}_{field}", column)
+    
+    def range(self, start: int, end: int, resolution: str = 'raw') -> Dict[str, np.ndarray]:
+        """Samples (or rollup buckets) with start <= time < end, as views of the mapped columns"""
+        prefix = '' if resolution == 'raw' else f"{resolution}_"
+        fields = ('value',) if resolution == 'raw' else ROLLUP_FIELDS
+        with self._lock:
+            times = self.column(f"{prefix}time")
+            lo, hi = np.searchsorted(times, [start, end])
+            result = {'time': times[lo:hi]}
+            for field in fields:
+                result[field] = self.column(f"{prefix}{field}")[lo:hi]
+        return result
+    
+    def value_at(self, moment: int):
+        """Latest value recorded at or before `moment`, or None before the first sample"""
+        with self._lock:
+            index = np.searchsorted(self.column('time'), moment, side='right') - 1
+            return float(self.column('value')[index]) if index >= 0 else None
+    
+    def summary(self, start: int, end: int) -> Dict[str, float]:
+        """Low, high and mean over a window, read from the coarsest rollup that still resolves it"""
+        resolution = 'minute'
+        for name, width in ROLLUP_RESOLUTIONS.items():
+            # Keep edge buckets under ~2% of the window
+            if width * 48 <= end - start:
+                resolution = name
+        buckets = self.range(start, end, resolution)
+        count = int(buckets['count'].sum())
+        if not count:
+            return {}
+        return {
+            'min': float(buckets['min'].min()),
+            'max': float(buckets['max'].max()),
+            'mean': float(buckets['sum'].sum()) / count,
+            'count': count
+        }
+
+class MetricStore:
+    """Every tool metric's time series under one directory, as root/<tool_id>/<metric>/
+    
+    `version` increases with every append, so cached reports built from
+    the history can tell when it has moved on.
+    """
+    
+    def __init__(self, root: str):
+        self.root = root
+        self.version = 0
+        self._series = {}
+        self._lock = threading.Lock()
+    
+    def series(self, tool_id: str, metric: str) -> MetricSeries:
+        with self._lock:
+            series = self._series.get((tool_id, metric))
+            if series is None:
+                series = self._series[(tool_id, metric)] = MetricSeries(os.path.join(self.root, tool_id, metric))
+            return series
+    
+    def metrics(self, tool_id: str) -> List[str]:
+        """Metrics of a tool that have history, in name order"""
+        directory = os.path.join(self.root, tool_id)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(name for name in os.listdir(directory) if len(self.series(tool_id, name)))
+    
+    def append(self, tool_id: str, metric: str, times, values) -> int:
+        appended = self.series(tool_id, metric).append(times, values)
+        with self._lock:
+            self.version += 1
+        return appended
+    
+    def record(self, tool_id: str, payload: Dict[str, Any], at: float = None) -> int:
+        """Append each numeric scalar in a tool payload as one sample taken at `at` (default now)"""
+        at = int(time.time() if at is None else at)
+        recorded = 0
+        for metric, value in payload.items():
+            if isinstance(value, (int, float, np.number)) and not isinstance(value, bool):
+                series = self.series(tool_id, metric)
+                last = series.last_time()
+                # Several refreshes within one second keep the first sample
+                if last is None or at > last:
+                    series.append([at], [value])
+                    recorded += 1
+        if recorded:
+            with self._lock:
+                self.version += 1
+        return recorded
+
+def generate_synthetic_data(scale: int = 1, seed: int = 0, projects: int = None, tickets: int = None,
+                            members: int = None, pages: int = None) -> Dict[str, Dict[str, Any]]:
+    """Seeded payloads with the same shape as the mock data, scaled up for benchmarking
+    
+    List sizes default to the mock data's sizes times `scale` and can be set
+    individually; the same seed always produces the same data.
+    """
+    rng = random.Random(seed)
+    projects = 3 * scale if projects is None else projects
+    tickets = 3 * scale if tickets is None else tickets
+    members = 4 * scale if members is None else members
+    pages = 3 * scale if pages is None else pages
+    
+    statuses = ['On Track', 'Behind Schedule', 'Ahead of Schedule']
+    priorities = ['High', 'Medium', 'Low']
+    ticket_statuses = ['Open', 'In Progress', 'Pending']
+    workload_levels = ['Overloaded', 'Busy', 'Available']
+    subjects = ['Login Issues', 'Analytics Question', 'Feature Request', 'Billing Question', 'Data Export']
+    start = datetime(2025, 6, 1)
+    names = [f"Member {i + 1}" for i in range(members)]
+    
+    def availability():
+        hour = rng.randint(9, 16)
+        return rng.choice([
+            f"Busy until {hour % 12 or 12} {'AM' if hour < 12 else 'PM'}",
+            f"Available after {hour % 12 or 12} {'AM' if hour < 12 else 'PM'}",
+            "Free all day",
+            f"Busy {hour % 12 or 12}-{(hour + 2) % 12 or 12} PM" if hour >= 12 else "Free all day"
+        ])
+    
+    return {
+        'asana': {
+            'projects': [
+                {'name': f"Project {i + 1}", 'status': rng.choice(statuses), 'progress': rng.randint(0, 100),
+                 'due_date': (start + timedelta(days=rng.randint(0, 120))).strftime('%Y-%m-%d')}
+                for i in range(projects)
+            ],
+            'team_workload': {
+                name: {'utilization': rng.randint(40, 100), 'availability': rng.choice(workload_levels)}
+                for name in names
+            }
+        },
+        'google_analytics': {
+            'page_views': rng.randint(10_000, 100_000) * scale,
+            'conversion_rate': round(rng.uniform(1, 6), 1),
+            'bounce_rate': round(rng.uniform(20, 60), 1),
+            'top_pages': sorted(({'page': f"/page-{i + 1}", 'views': rng.randint(100, 10_000)} for i in range(pages)),
+                                key=lambda page: -page['views'])
+        },
+        'quickbooks': {
+            'monthly_revenue': rng.randint(50_000, 120_000) * scale,
+            'outstanding_invoices': rng.randint(5_000, 40_000) * scale,
+            'profit_margin': round(rng.uniform(10, 50), 1),
+            'expenses': rng.randint(20_000, 80_000) * scale
+        },
+        'zendesk': {
+            'tickets': [
+                {'id': i + 1, 'client': f"Client {rng.randint(1, max(tickets // 10, 1))}", 'subject': rng.choice(subjects),
+                 'priority': rng.choice(priorities), 'status': rng.choice(ticket_statuses),
+                 # Oldest first, one every 7 minutes; derived from the index so the seeded stream is unchanged
+                 'created_at': (start - timedelta(minutes=7 * (tickets - i))).isoformat()}
+                for i in range(tickets)
+            ],
+            'avg_response_time': f"{rng.uniform(0.5, 8):.1f} hours",
+            'customer_satisfaction': round(rng.uniform(3.5, 5.0), 1)
+        },
+        'google_calendar': {
+            'meetings_today': rng.randint(0, 3 * members),
+            'availability': {name: availability() for name in names}
+        },
+        'hootsuite': {
+            'total_followers': rng.randint(5_000, 50_000) * scale,
+            'engagement_rate': round(rng.uniform(1, 8), 1),
+            'posts_this_week': rng.randint(3, 30),
+            'reach': rng.randint(10_000, 100_000) * scale
+        },
+        'hubspot': {
+            'pipeline_value': rng.randint(100_000, 1_000_000) * scale,
+            'deals_won': rng.randint(1, 30) * scale,
+            'conversion_rate': round(rng.uniform(10, 40), 1),
+            'new_leads': rng.randint(5, 50) * scale
+        },
+        'slack': {
+            'messages_today': rng.randint(50, 500) * scale,
+            'active_users': members,
+            'urgent_mentions': rng.randint(0, 10)
+        }
+    }
+
+def downsample_lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Indices of the `threshold` points Largest-Triangle-Three-Buckets keeps
+    
+    Always keeps the first and last points; from each bucket in between it
+    keeps the point forming the largest triangle with the previous pick and
+    the next bucket's average, which preserves peaks and dips that plain
+    striding would drop. One vectorized pass per bucket, so O(len(x)).
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        lo, hi = edges[bucket], edges[bucket + 1]
+        if bucket + 2 < len(edges):
+            next_x, next_y = x[hi:edges[bucket + 2]].mean(), y[hi:edges[bucket + 2]].mean()
+        else:
+            next_x, next_y = x[-1], y[-1]
+        # Twice the triangle area; the constant factor does not change the argmax
+        area = np.abs((x[previous] - next_x) * (y[lo:hi] - y[previous])
+                      - (x[previous] - x[lo:hi]) * (next_y - y[previous]))
+        previous = lo + int(area.argmax())
+        selected[bucket + 1] = previous
+    return selected
+
+def seed_metric_history(store: MetricStore, tool_data: Dict[str, Dict[str, Any]], days: int = 90,
+                        interval: int = 900, seed: int = 0, end: float = None) -> int:
+    """Back-fill a seeded random-walk history for every numeric metric, ending at its current value
+    
+    Gives the trend reports something to show before real samples have
+    accumulated; returns the number of samples written.
+    """
+    rng = np.random.default_rng(seed)
+    end = int(time.time() if end is None else end)
+    times = end - interval * np.arange(days * 86400 // interval + 1, dtype=np.int64)[::-1]
+    written = 0
+    for tool_id, payload in tool_data.items():
+        for metric, value in payload.items():
+            if not isinstance(value, (int, float, np.number)) or isinstance(value, bool):
+                continue
+            # Walk backwards from today's value so the history lands exactly on it
+            steps = rng.normal(rng.normal(0, 0.000005), 0.0004, len(times))
+            history = float(value) * np.exp(np.r_[np.cumsum(steps[:0:-1])[::-1], 0.0])
+            if isinstance(value, (int, np.integer)):
+                history = np.round(history)
+            written += store.append(tool_id, metric, times, history)
+    return written
 
-# Initialize session state
-if 'connected_tools' not in st.session_state:
-    st.session_state.connected_tools = set()
-if 'query_history' not in st.session_state:
-    st.session_state.query_history = []
+class PendingToolData:
+    """Read-only mapping over tool fetches that are still in flight
+    
+    Checking or reading a tool waits only for that tool's fetch, up to its
+    deadline counted from when all fetches started; tools that miss it are
+    recorded in `missing` and treated as absent.
+    """
+    
+    def __init__(self, futures: Dict[str, Future], deadlines: Dict[str, float]):
+        self._futures = futures
+        self._deadlines = deadlines
+        self._started = time.monotonic()
+        self._results = {}
+        self.missing = []
+    
+    def _resolve(self, tool_id: str) -> bool:
+        if tool_id in self._results:
+            return True
+        future = self._futures.get(tool_id)
+        if future is None or tool_id in self.missing:
+            return False
+        
+        remaining = self._started + self._deadlines.get(tool_id, DEFAULT_TOOL_DEADLINE) - time.monotonic()
+        try:
+            self._results[tool_id] = future.result(timeout=max(remaining, 0))
+            return True
+        except Exception:
+            self.missing.append(tool_id)
+            return False
+    
+    def __contains__(self, tool_id):
+        return self._resolve(tool_id)
+    
+    def __getitem__(self, tool_id):
+        if not self._resolve(tool_id):
+            raise KeyError(tool_id)
+        return self._results[tool_id]
 
 class MCPToolManager:
     """Manages MCP tool connections and data retrieval"""
     
-    def __init__(self):
+    def __init__(self, connectors: Dict[str, MCPConnector] = None):
         self.tools = {
             'asana': {
                 'name': 'Asana',
@@ -137,6 +1791,48 @@ class MCPToolManager:
         }
         
         self.mock_data = self._initialize_mock_data()
+        if connectors is None:
+            connectors = {tool_id: MockConnector(tool_id, payload) for tool_id, payload in self.mock_data.items()}
+        self.connectors = connectors
+        self.deadlines = {tool_id: DEFAULT_TOOL_DEADLINE for tool_id in self.tools}
+        
+        # Identical concurrent fetches share one upstream call; each upstream gets a
+        # concurrency cap and a breaker so a failing one is not hammered with retries
+        self.flights = SingleFlight()
+        self.limits = {tool_id: threading.BoundedSemaphore(CONNECTOR_CONCURRENCY) for tool_id in self.connectors}
+        self.breakers = {tool_id: CircuitBreaker(BREAKER_THRESHOLD, BREAKER_RESET_SECONDS) for tool_id in self.connectors}
+        # Lives on the shared manager so timings survive Streamlit reruns; MCP_PERF_SAMPLE_RATE=0 turns them off
+        self.perf = PerfRecorder(float(os.environ.get('MCP_PERF_SAMPLE_RATE', '1.0')))
+        # Own pool so a fetch that overran its deadline never delays the caller
+        self._fetch_pool = ThreadPoolExecutor(max_workers=len(self.tools), thread_name_prefix="mcp-fetch")
+        
+        # A connector that fails or overruns the startup deadline is left out of the
+        # first snapshot; the scheduler keeps retrying it and publishes it once it loads
+        futures = {tool_id: self._fetch_pool.submit(self.fetch_upstream, tool_id) for tool_id in self.connectors}
+        wait(futures.values(), timeout=STARTUP_FETCH_DEADLINE)
+        loaded = {tool_id: future.result() for tool_id, future in futures.items()
+                  if future.done() and future.exception() is None}
+        self.snapshots = SnapshotStore(loaded)
+        
+        # Freshness policy over the snapshot: background reloads publish new versions
+        self.cache = ToolDataCache(self._load_entry, TOOL_TTLS, on_refresh=self._publish_refresh)
+        for tool_id in self.connectors:
+            if tool_id in loaded:
+                self.cache.put(tool_id, loaded[tool_id])
+            else:
+                self.cache.want(tool_id)
+        self.scheduler = RefreshScheduler(self.cache)
+        
+        # Summary counters maintained from change events between snapshot refreshes
+        self.aggregates = MaterializedAggregates(self.snapshots.current.data)
+        self.events = queue.Queue()
+        self._event_thread = None
+        
+        # Finished reports, reusable until the data they were built from changes
+        self.reports = ReportCache()
+        
+        # Metric history for trend reports; see use_metric_store
+        self.metrics = None
     
     def _initialize_mock_data(self):
         """Initialize comprehensive mock data"""
@@ -172,9 +1868,12 @@ class MCPToolManager:
             },
             'zendesk': {
                 'tickets': [
-                    {'client': 'TechCorp', 'subject': 'Login Issues', 'priority': 'High', 'status': 'Open'},
-                    {'client': 'RetailPlus', 'subject': 'Analytics Question', 'priority': 'Medium', 'status': 'In Progress'},
-                    {'client': 'StartupHub', 'subject': 'Feature Request', 'priority': 'Low', 'status': 'Pending'}
+                    {'id': 1001, 'client': 'TechCorp', 'subject': 'Login Issues', 'priority': 'High', 'status': 'Open',
+                     'created_at': '2025-06-02T09:15:00'},
+                    {'id': 1002, 'client': 'RetailPlus', 'subject': 'Analytics Question', 'priority': 'Medium', 'status': 'In Progress',
+                     'created_at': '2025-06-01T14:30:00'},
+                    {'id': 1003, 'client': 'StartupHub', 'subject': 'Feature Request', 'priority': 'Low', 'status': 'Pending',
+                     'created_at': '2025-05-29T11:00:00'}
                 ],
                 'avg_response_time': '2.5 hours',
                 'customer_satisfaction': 4.6
@@ -207,190 +1906,1232 @@ class MCPToolManager:
             }
         }
     
+    @classmethod
+    def from_payloads(cls, payloads: Dict[str, Dict[str, Any]]):
+        """Build a manager serving the given payloads from memory, e.g. synthetic data"""
+        return cls({tool_id: MockConnector(tool_id, payload) for tool_id, payload in payloads.items()})
+    
+    @classmethod
+    def from_url(cls, base_url: str, pool_size: int = 8):
+        """Build a manager whose connectors talk HTTP to `base_url`"""
+        return cls({tool_id: connector(base_url, pool_size) for tool_id, connector in CONNECTOR_CLASSES.items()})
+    
+    def fetch_upstream(self, tool_id: str):
+        """Fetch a tool's payload from its connector, bypassing the snapshot
+        
+        Concurrent calls for the same tool share one fetch.
+        """
+        if tool_id not in self.connectors:
+            return {}
+        return self.flights.do((tool_id, None), self._fetch_payload, tool_id)
+    
+    def _fetch_payload(self, tool_id: str):
+        with self.perf.span('connector', tool_id):
+            with self._upstream(tool_id):
+                payload = self.connectors[tool_id].fetch()
+            return to_columnar(tool_id, payload)
+    
+    def _fetch_page(self, tool_id: str, scope):
+        key, offset, limit = scope
+        with self._upstream(tool_id):
+            return self.connectors[tool_id].fetch_page(key, offset, limit)
+    
+    @contextmanager
+    def _upstream(self, tool_id: str):
+        # The breaker check comes first so an open circuit fails fast instead of queueing
+        with self.breakers[tool_id].guard(), self.limits[tool_id]:
+            yield
+    
+    def _load_entry(self, tool_id: str, scope):
+        if scope is None:
+            return self.fetch_upstream(tool_id)
+        return self.flights.do((tool_id, scope), self._fetch_page, tool_id, scope)
+    
+    def upstream_stats(self) -> Dict[str, Any]:
+        """Coalescing counters and the state of every upstream's circuit breaker"""
+        return {
+            **self.flights.counters,
+            'breakers': {tool_id: breaker.state for tool_id, breaker in self.breakers.items()},
+            'rejected': sum(breaker.counters['rejected'] for breaker in self.breakers.values())
+        }
+    
+    def _publish_refresh(self, tool_id: str, payload):
+        # Only bump the snapshot version when the upstream data actually changed
+        current = self.snapshots.current.get(tool_id)
+        if not payloads_equal(payload, current):
+            self._publish({tool_id: payload})
+    
+    def _publish(self, updates: Dict[str, Any]) -> DataSnapshot:
+        snapshot = self.snapshots.publish(updates)
+        # Fresh upstream data supersedes the events applied since the last rebuild
+        if any(tool_id in AGGREGATE_TOOLS for tool_id in updates):
+            # Versions keep counting up across rebuilds so they never repeat
+            self.aggregates = MaterializedAggregates(snapshot.data, self.aggregates.version + 1)
+        if self.metrics is not None:
+            for tool_id, payload in updates.items():
+                self.metrics.record(tool_id, payload)
+        return snapshot
+    
+    def use_metric_store(self, metrics: MetricStore, seed_days: int = 90):
+        """Record every published snapshot's metrics into `metrics`
+        
+        An empty store is back-filled with `seed_days` of made-up history;
+        pass 0 for real backends, whose history starts with their first sample.
+        """
+        tool_data = self.snapshots.current.data
+        if seed_days and not any(metrics.metrics(tool_id) for tool_id in tool_data):
+            seed_metric_history(metrics, tool_data, seed_days)
+        else:
+            for tool_id, payload in tool_data.items():
+                metrics.record(tool_id, payload)
+        self.metrics = metrics
+    
+    def data_version(self, sources=DATA_SOURCES) -> Tuple[int, ...]:
+        """Versions of the given DATA_SOURCES: a new snapshot, an applied event or a metric sample bumps one"""
+        versions = {'snapshot': self.snapshots.current.version, 'aggregates': self.aggregates.version,
+                    'metrics': self.metrics.version if self.metrics is not None else 0}
+        return tuple(versions[source] for source in sources)
+    
     def get_tool_data(self, tool_id: str):
-        return self.mock_data.get(tool_id, {})
+        if tool_id not in self.connectors:
+            return {}
+        with self.perf.span('fetch', tool_id):
+            return self.cache.get(tool_id)
     
-    def is_connected(self, tool_id: str):
-        return tool_id in st.session_state.connected_tools
+    def get_tool_page(self, tool_id: str, key: str, offset: int = 0, limit: int = MAX_PAGE_SIZE):
+        """One cached page of a paginated field, e.g. ('zendesk', 'tickets')"""
+        return self.cache.get(tool_id, (key, offset, limit))
+    
+    def refresh_snapshot(self) -> DataSnapshot:
+        """Re-fetch every tool concurrently and publish the results as a new snapshot
+        
+        Tools that miss their deadline keep their payload from the previous snapshot.
+        """
+        tool_data, _ = asyncio.run(self.fetch_tools(list(self.connectors), self.fetch_upstream))
+        for tool_id, payload in tool_data.items():
+            self.cache.put(tool_id, payload)
+        return self._publish(tool_data)
+    
+    def ingest(self, event: Dict[str, Any]) -> bool:
+        """Apply one change event (ticket created, invoice paid, ...) to the aggregates"""
+        return self.aggregates.apply(event)
+    
+    def ingest_file(self, path: str) -> int:
+        """Apply every event in a JSONL file and return how many were applied"""
+        applied = 0
+        with open(path) as events:
+            for line in events:
+                if line.strip():
+                    try:
+                        applied += self.ingest(json.loads(line))
+                    except json.JSONDecodeError:
+                        self.aggregates.apply(None)
+        return applied
+    
+    def start_event_feed(self, path: str = None, poll_interval: float = 0.5):
+        """Apply events from `self.events`, and from a JSONL file as it grows, in the background"""
+        def run():
+            offset = 0
+            while True:
+                try:
+                    self.ingest(self.events.get(timeout=poll_interval))
+                    continue
+                except queue.Empty:
+                    pass
+                if path and os.path.exists(path):
+                    with open(path, 'rb') as feed:
+                        feed.seek(offset)
+                        # Only consume complete lines; a partly written one is picked up next time
+                        for line in iter(feed.readline, b''):
+                            if not line.endswith(b'\n'):
+                                break
+                            offset += len(line)
+                            if line.strip():
+                                try:
+                                    self.ingest(json.loads(line))
+                                except json.JSONDecodeError:
+                                    # Count it like any other bad event and keep the feed alive
+                                    self.aggregates.apply(None)
+        
+        if self._event_thread is None:
+            self._event_thread = threading.Thread(target=run, name="mcp-event-feed", daemon=True)
+            self._event_thread.start()
+    
+    def start_fetches(self, tool_ids: List[str]) -> PendingToolData:
+        """Start fetching every tool at once without waiting for any of them"""
+        futures = {tool_id: self._fetch_pool.submit(self.get_tool_data, tool_id) for tool_id in tool_ids}
+        return PendingToolData(futures, self.deadlines)
+    
+    async def get_tool_data_async(self, tool_id: str, fetch=None):
+        """Fetch one tool without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._fetch_pool, fetch or self.get_tool_data, tool_id)
+    
+    async def fetch_tools(self, tool_ids: List[str], fetch=None) -> Tuple[Dict[str, Any], List[str]]:
+        """Fetch several tools concurrently, each bounded by its own deadline
+        
+        `fetch` defaults to get_tool_data. Returns the data of every tool that
+        answered in time and the ids of the tools that timed out or failed.
+        """
+        async def fetch_one(tool_id):
+            deadline = self.deadlines.get(tool_id, DEFAULT_TOOL_DEADLINE)
+            return await asyncio.wait_for(self.get_tool_data_async(tool_id, fetch), deadline)
+        
+        results = await asyncio.gather(*(fetch_one(tool_id) for tool_id in tool_ids), return_exceptions=True)
+        
+        tool_data, missing = {}, []
+        for tool_id, result in zip(tool_ids, results):
+            if isinstance(result, BaseException):
+                missing.append(tool_id)
+            else:
+                tool_data[tool_id] = result
+        return tool_data, missing
+    
+    def is_connected(self, tool_id: str, connected_tools) -> bool:
+        return tool_id in connected_tools
+
+# Keyword weights that route a query to each report; dict order breaks score ties.
+# Generic words like "summary" weigh less so "support tickets overview" stays a support query.
+INTENT_KEYWORDS = {
+    'executive': {'executive': 1.0, 'summary': 0.4, 'overview': 0.4},
+    'project': {'project': 1.0, 'task': 1.0},
+    'financial': {'revenue': 1.0, 'financial': 1.0, 'money': 1.0},
+    'team': {'team': 1.0, 'availability': 1.0, 'free': 1.0, 'slot': 1.0, 'assign': 1.0, 'assignee': 1.0,
+             'utilization': 0.6},
+    'support': {'support': 1.0, 'ticket': 1.0},
+    'trend': {'trend': 1.0, 'trending': 1.0, 'history': 1.0, 'growth': 1.0, 'quarter': 0.4}
+}
+
+# Intents scoring below this fraction of the best match are treated as incidental
+MIN_RELATIVE_SCORE = 0.5
+
+class IntentRouter:
+    """Routes a query to every report it asks for in a single pass over its tokens
+    
+    Keywords (and their plural forms) are compiled into one token -> intents
+    map, so routing cost grows with the query length, not the vocabulary.
+    """
+    
+    TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+    
+    def __init__(self, keywords: Dict[str, Dict[str, float]] = None):
+        keywords = INTENT_KEYWORDS if keywords is None else keywords
+        self.order = {intent: rank for rank, intent in enumerate(keywords)}
+        self.index = {}
+        for intent, words in keywords.items():
+            for word, weight in words.items():
+                for form in self._forms(word):
+                    self.index.setdefault(form, {})[intent] = weight
+    
+    @staticmethod
+    def _forms(word: str):
+        forms = {word, word + 's', word + 'es'}
+        if word.endswith('y'):
+            forms.add(word[:-1] + 'ies')
+        return forms
+    
+    def route(self, query: str) -> List[Tuple[str, float]]:
+        """Matched intents with their scores, best first"""
+        scores = {}
+        for token in self.TOKEN_PATTERN.findall(query.lower()):
+            for intent, weight in self.index.get(token, {}).items():
+                scores[intent] = scores.get(intent, 0.0) + weight
+        
+        if not scores:
+            return []
+        threshold = max(scores.values()) * MIN_RELATIVE_SCORE
+        ranked = [(intent, score) for intent, score in scores.items() if score >= threshold]
+        return sorted(ranked, key=lambda match: (-match[1], self.order[match[0]]))
 
 class MCPQueryProcessor:
     """Processes queries across multiple connected tools"""
     
-    def __init__(self, tool_manager: MCPToolManager):
+    def __init__(self, tool_manager: MCPToolManager, router: IntentRouter = None, workers: 'ReportProcessPool' = None):
         self.tool_manager = tool_manager
+        self.router = router or IntentRouter()
+        # Optional process pool that builds snapshot-only reports off this thread
+        self.workers = workers
+        self.builders = {
+            'executive': self._generate_executive_summary,
+            'project': self._generate_project_report,
+            'financial': self._generate_financial_report,
+            'team': self._generate_team_report,
+            'support': self._generate_support_report,
+            'trend': self._generate_trend_report
+        }
     
-    def process_query(self, query: str) -> str:
-        """Process a query and return comprehensive response"""
-        connected_tools = list(st.session_state.connected_tools)
+    def process_query(self, query: str, connected_tools, page: int = 0) -> str:
+        """Process a query against the given connected tools and return comprehensive response"""
+        return "".join(self.stream_query(query, connected_tools, page))
+    
+    def stream_query(self, query: str, connected_tools, page: int = 0) -> Iterator[str]:
+        """Yield the response section by section as each section's tools arrive
+        
+        Every tool the matched reports need is fetched at once; a section
+        only waits for its own tool, so early sections render while slower
+        tools are still loading. `page` selects which REPORT_PAGE_SIZE slice
+        of the ranked project and ticket listings is shown.
+        """
+        connected_tools = list(connected_tools)
+        
+        if not connected_tools:
+            yield "❌ No tools connected. Please connect your business tools to get AI-powered insights."
+            return
+        
+        with self.tool_manager.perf.span('routing', 'router'):
+            intents = [intent for intent, _ in self.router.route(query)]
+        slot = parse_slot_request(query) if 'team' in intents else None
+        
+        key = self._report_key(query, intents, connected_tools, page, slot)
+        report = self.tool_manager.reports.get(key)
+        if report is not None:
+            yield report
+            return
+        
+        if not intents:
+            yield from self._remember(key, self._generate_general_insights(connected_tools, query))
+            return
+        
+        future = self._offload(intents, connected_tools, page, slot)
+        if future is not None:
+            try:
+                # Empty heartbeats let the consumer (a Streamlit rerender) abandon the wait
+                while not wait([future], timeout=self.workers.poll_interval * 2).done:
+                    yield ""
+                report = future.result()
+            except Exception:
+                report = None
+            finally:
+                if not future.done():
+                    self.workers.cancel(future)
+            if report is not None:
+                yield from self._remember(key, [report])
+                return
+        
+        tool_data = self.tool_manager.start_fetches(self._needed_tools(intents, connected_tools))
+        yield from self._remember(key, self._join_reports(intents, connected_tools, tool_data, page, slot), tool_data)
+    
+    async def process_query_async(self, query: str, connected_tools, page: int = 0) -> str:
+        """Fetch every tool the matched reports need at once, then build them"""
+        connected_tools = list(connected_tools)
         
         if not connected_tools:
             return "❌ No tools connected. Please connect your business tools to get AI-powered insights."
         
-        query_lower = query.lower()
-        
-        if any(word in query_lower for word in ['summary', 'overview', 'executive']):
-            return self._generate_executive_summary(connected_tools)
-        elif any(word in query_lower for word in ['project', 'task']):
-            return self._generate_project_report(connected_tools)
-        elif any(word in query_lower for word in ['revenue', 'financial', 'money']):
-            return self._generate_financial_report(connected_tools)
-        elif any(word in query_lower for word in ['team', 'availability']):
-            return self._generate_team_report(connected_tools)
-        elif any(word in query_lower for word in ['support', 'ticket']):
-            return self._generate_support_report(connected_tools)
+        with self.tool_manager.perf.span('routing', 'router'):
+            intents = [intent for intent, _ in self.router.route(query)]
+        slot = parse_slot_request(query) if 'team' in intents else None
+        
+        key = self._report_key(query, intents, connected_tools, page, slot)
+        report = self.tool_manager.reports.get(key)
+        if report is not None:
+            return report
+        
+        if not intents:
+            report = "".join(self._generate_general_insights(connected_tools, query))
+            self.tool_manager.reports.put(key, report)
+            return report
+        
+        future = self._offload(intents, connected_tools, page, slot)
+        if future is not None:
+            try:
+                report = await asyncio.wrap_future(future)
+                self.tool_manager.reports.put(key, report)
+                return report
+            except asyncio.CancelledError:
+                self.workers.cancel(future)
+                raise
+            except Exception:
+                pass
+        
+        tool_data, missing = await self.tool_manager.fetch_tools(self._needed_tools(intents, connected_tools))
+        # Build off the event loop so one large report doesn't stall every other connection
+        report = await asyncio.get_running_loop().run_in_executor(
+            None, lambda: "".join(self._join_reports(intents, connected_tools, tool_data, page, slot)))
+        if missing:
+            return report + self._partial_notice(missing)
+        self.tool_manager.reports.put(key, report)
+        return report
+    
+    def _offload(self, intents, connected_tools, page=0, slot=None):
+        """Hand the reports to the process pool if it can build them; None means build them here
+        
+        A full queue or a failed worker falls back to building in the calling thread.
+        """
+        if self.workers is None or not all(intent in OFFLOAD_INTENTS for intent in intents):
+            return None
+        try:
+            return self.workers.submit(intents, connected_tools, page, slot, timeout=0)
+        except queue.Full:
+            return None
+    
+    def _report_key(self, query, intents, connected_tools, page=0, slot=None):
+        # Reports depend only on their intents, tools, page, slot request and the data they read;
+        # the general answer also echoes the query
+        read = {source for intent in intents or ['general'] for source in REPORT_SOURCES.get(intent, ('snapshot',))}
+        sources = tuple(source for source in DATA_SOURCES if source in read)
+        return (tuple(intents) or ('general', query), frozenset(connected_tools), page, slot, sources,
+                self.tool_manager.data_version(sources))
+    
+    def _remember(self, key, sections, tool_data: PendingToolData = None):
+        """Pass sections through and cache the finished report unless a tool missed its deadline"""
+        built = []
+        for section in sections:
+            built.append(section)
+            yield section
+        if tool_data is not None and tool_data.missing:
+            yield self._partial_notice(tool_data.missing)
         else:
-            return self._generate_general_insights(connected_tools, query)
-    
-    def _generate_executive_summary(self, connected_tools):
-        summary = f"📊 EXECUTIVE SUMMARY\nGenerated from {len(connected_tools)} connected tools\n\n"
-        
-        if 'asana' in connected_tools:
-            data = self.tool_manager.get_tool_data('asana')
-            projects = data['projects']
-            avg_progress = sum(p['progress'] for p in projects) / len(projects)
-            summary += f"📋 PROJECTS:\n"
-            summary += f"• Average progress: {avg_progress:.1f}%\n"
-            summary += f"• {sum(1 for p in projects if p['status'] == 'On Track')} on track, "
-            summary += f"{sum(1 for p in projects if p['status'] == 'Behind Schedule')} behind\n\n"
-        
-        if 'quickbooks' in connected_tools:
-            data = self.tool_manager.get_tool_data('quickbooks')
-            summary += f"💰 FINANCIAL:\n"
-            summary += f"• Monthly revenue: ${data['monthly_revenue']:,}\n"
-            summary += f"• Outstanding invoices: ${data['outstanding_invoices']:,}\n"
-            summary += f"• Profit margin: {data['profit_margin']}%\n\n"
-        
-        if 'zendesk' in connected_tools:
-            data = self.tool_manager.get_tool_data('zendesk')
-            high_priority = sum(1 for t in data['tickets'] if t['priority'] == 'High')
-            summary += f"🎫 SUPPORT:\n"
-            summary += f"• {len(data['tickets'])} active tickets\n"
-            summary += f"• {high_priority} high priority issues\n"
-            summary += f"• Customer satisfaction: {data['customer_satisfaction']}/5.0\n\n"
-        
-        if 'google_analytics' in connected_tools:
-            data = self.tool_manager.get_tool_data('google_analytics')
-            summary += f"📈 WEBSITE:\n"
-            summary += f"• Page views: {data['page_views']:,}\n"
-            summary += f"• Conversion rate: {data['conversion_rate']}%\n"
-            summary += f"• Bounce rate: {data['bounce_rate']}%\n\n"
-        
-        summary += "🎯 KEY ACTIONS:\n"
-        if 'asana' in connected_tools:
-            behind_projects = [p for p in self.tool_manager.get_tool_data('asana')['projects'] 
-                             if p['status'] == 'Behind Schedule']
+            self.tool_manager.reports.put(key, "".join(built))
+    
+    def _needed_tools(self, intents, connected_tools):
+        return [tool_id for tool_id in connected_tools
+                if any(tool_id in REPORT_TOOLS[intent] for intent in intents)]
+    
+    def _join_reports(self, intents, connected_tools, tool_data, page=0, slot=None):
+        # Blank line between reports, skipping reports that came back empty
+        emitted = False
+        for intent in intents:
+            separator = "\n" if emitted else ""
+            # Time only the builder itself, not whoever consumes the sections between yields
+            perf = self.tool_manager.perf
+            timed = perf.sampled()
+            elapsed = 0.0
+            builder = self.builders[intent](connected_tools, tool_data, page, slot)
+            while True:
+                start = time.perf_counter() if timed else 0.0
+                section = next(builder, None)
+                if timed:
+                    elapsed += time.perf_counter() - start
+                if section is None:
+                    break
+                if section:
+                    yield separator + section
+                    separator = ""
+                    emitted = True
+            if timed:
+                perf.observe('report', intent, elapsed)
+    
+    def _partial_notice(self, missing):
+        if not missing:
+            return ""
+        names = ", ".join(self.tool_manager.tools[tool_id]['name'] for tool_id in missing)
+        return f"\n⏱️ PARTIAL REPORT: no response from {names} within the deadline\n"
+    
+    def _generate_executive_summary(self, connected_tools, tool_data, page=0, slot=None):
+        yield f"📊 EXECUTIVE SUMMARY\nGenerated from {len(connected_tools)} connected tools\n\n"
+        
+        # Counts come from the event-maintained aggregates rather than a rescan of every row
+        totals = self.tool_manager.aggregates.view()
+        
+        if 'asana' in tool_data:
+            avg_progress = totals['progress_sum'] / totals['project_count'] if totals['project_count'] else 0.0
+            on_track = totals['projects_by_status'].get('On Track', 0)
+            behind = totals['projects_by_status'].get('Behind Schedule', 0)
+            yield (f"📋 PROJECTS:\n"
+                   f"• Average progress: {avg_progress:.1f}%\n"
+                   f"• {on_track} on track, {behind} behind\n\n")
+        
+        if 'quickbooks' in tool_data:
+            data = tool_data['quickbooks']
+            yield (f"💰 FINANCIAL:\n"
+                   f"• Monthly revenue: ${data['monthly_revenue']:,}\n"
+                   f"• Outstanding invoices: ${totals['outstanding_invoices']:,}\n"
+                   f"• Profit margin: {data['profit_margin']}%\n\n")
+        
+        if 'zendesk' in tool_data:
+            data = tool_data['zendesk']
+            high_priority = totals['tickets_by_priority'].get('High', 0)
+            yield (f"🎫 SUPPORT:\n"
+                   f"• {totals['ticket_count']} active tickets\n"
+                   f"• {high_priority} high priority issues\n"
+                   f"• Customer satisfaction: {data['customer_satisfaction']}/5.0\n\n")
+        
+        if 'google_analytics' in tool_data:
+            data = tool_data['google_analytics']
+            yield (f"📈 WEBSITE:\n"
+                   f"• Page views: {data['page_views']:,}\n"
+                   f"• Conversion rate: {data['conversion_rate']}%\n"
+                   f"• Bounce rate: {data['bounce_rate']}%\n\n")
+        
+        actions = ["🎯 KEY ACTIONS:\n"]
+        if 'asana' in tool_data:
+            behind_projects = totals['projects_by_status'].get('Behind Schedule', 0)
             if behind_projects:
-                summary += f"• Focus on {len(behind_projects)} behind-schedule projects\n"
+                actions.append(f"• Focus on {behind_projects} behind-schedule projects\n")
         
-        if 'quickbooks' in connected_tools:
-            outstanding = self.tool_manager.get_tool_data('quickbooks')['outstanding_invoices']
-            if outstanding > 20000:
-                summary += f"• Follow up on outstanding invoices\n"
+        if 'quickbooks' in tool_data:
+            if totals['outstanding_invoices'] > 20000:
+                actions.append("• Follow up on outstanding invoices\n")
         
-        return summary
+        yield "".join(actions)
     
-    def _generate_project_report(self, connected_tools):
+    def _generate_project_report(self, connected_tools, tool_data, page=0, slot=None):
         if 'asana' not in connected_tools:
-            return "❌ Project management tool (Asana) not connected."
+            yield "❌ Project management tool (Asana) not connected."
+            return
+        if 'asana' not in tool_data:
+            return
         
-        data = self.tool_manager.get_tool_data('asana')
-        projects = data['projects']
-        
-        report = "📋 PROJECT STATUS REPORT\n\n"
-        for project in projects:
-            status_emoji = "🟢" if project['status'] == 'On Track' else "🟡" if project['status'] == 'Behind Schedule' else "🔵"
-            report += f"{status_emoji} {project['name']}\n"
-            report += f"   Progress: {project['progress']}%\n"
-            report += f"   Status: {project['status']}\n"
-            report += f"   Due: {project['due_date']}\n\n"
-        
-        return report
+        data = tool_data['asana']
+        projects, footer = self._ranked_page(data['projects'], data.get('projects_rank'), page, "projects", "most behind")
+        yield "📋 PROJECT STATUS REPORT\n\n"
+        if len(projects):
+            lines = (label_column(projects['status'], PROJECT_STATUS_EMOJI, "🔵") + " " + projects['name'].astype(str)
+                     + "\n   Progress: " + projects['progress'].astype(str)
+                     + "%\n   Status: " + projects['status'].astype(str)
+                     + "\n   Due: " + projects['due_date'].astype(str) + "\n\n")
+            yield "".join(lines)
+        if footer:
+            yield footer
     
-    def _generate_financial_report(self, connected_tools):
+    def _generate_financial_report(self, connected_tools, tool_data, page=0, slot=None):
         if 'quickbooks' not in connected_tools:
-            return "❌ Accounting tool (QuickBooks) not connected."
+            yield "❌ Accounting tool (QuickBooks) not connected."
+            return
+        if 'quickbooks' not in tool_data:
+            return
         
-        data = self.tool_manager.get_tool_data('quickbooks')
+        data = tool_data['quickbooks']
+        yield (f"💰 FINANCIAL REPORT\n\n"
+               f"📈 Revenue: ${data['monthly_revenue']:,}\n"
+               f"📋 Outstanding: ${self.tool_manager.aggregates.view()['outstanding_invoices']:,}\n"
+               f"💸 Expenses: ${data['expenses']:,}\n"
+               f"📊 Profit Margin: {data['profit_margin']}%\n")
+    
+    def _generate_team_report(self, connected_tools, tool_data, page=0, slot=None):
+        yield "👥 TEAM REPORT\n\n"
         
-        report = f"💰 FINANCIAL REPORT\n\n"
-        report += f"📈 Revenue: ${data['monthly_revenue']:,}\n"
-        report += f"📋 Outstanding: ${data['outstanding_invoices']:,}\n"
-        report += f"💸 Expenses: ${data['expenses']:,}\n"
-        report += f"📊 Profit Margin: {data['profit_margin']}%\n"
+        if slot is not None:
+            yield self._free_slot_section(connected_tools, tool_data, *slot)
         
-        return report
-    
-    def _generate_team_report(self, connected_tools):
-        report = "👥 TEAM REPORT\n\n"
+        if 'asana' in tool_data:
+            workload = tool_data['asana']['team_workload']
+            lines = (label_column(workload['availability'], WORKLOAD_EMOJI, "🟢") + " " + workload.index.to_series().astype(str)
+                     + ": " + workload['utilization'].astype(str)
+                     + "% - " + workload['availability'].astype(str) + "\n") if len(workload) else []
+            yield "💼 WORKLOAD:\n" + "".join(lines) + "\n"
         
-        if 'asana' in connected_tools:
-            data = self.tool_manager.get_tool_data('asana')
-            workload = data['team_workload']
-            
-            report += "💼 WORKLOAD:\n"
-            for member, stats in workload.items():
-                status_emoji = "🔴" if stats['availability'] == 'Overloaded' else "🟡" if stats['availability'] == 'Busy' else "🟢"
-                report += f"{status_emoji} {member}: {stats['utilization']}% - {stats['availability']}\n"
-            report += "\n"
-        
-        if 'google_calendar' in connected_tools:
-            data = self.tool_manager.get_tool_data('google_calendar')
-            report += f"📅 MEETINGS TODAY: {data['meetings_today']}\n\n"
-            report += "🕐 AVAILABILITY:\n"
+        if 'google_calendar' in tool_data:
+            data = tool_data['google_calendar']
+            lines = [f"📅 MEETINGS TODAY: {data['meetings_today']}\n\n", "🕐 AVAILABILITY:\n"]
             for member, status in data['availability'].items():
-                report += f"• {member}: {status}\n"
+                lines.append(f"• {member}: {status}\n")
+            yield "".join(lines)
+    
+    def _free_slot_section(self, connected_tools, tool_data, start, end, minutes, max_utilization):
+        """Best assignees for a slot request: free long enough in the window, least utilized first"""
+        if 'google_calendar' not in connected_tools:
+            return "❌ Calendar tool (Google Calendar) not connected.\n\n"
+        if 'google_calendar' not in tool_data:
+            return ""
         
-        return report
+        index = tool_data['google_calendar'].get('busy_index')
+        workload = tool_data['asana']['team_workload'] if 'asana' in tool_data else None
+        length = " ".join(part for part in (f"{minutes // 60} h" if minutes >= 60 else "",
+                                            f"{minutes % 60} min" if minutes % 60 else "") if part)
+        header = (f"🗓️ FREE FOR {length} · {start:%a %d %b %H:%M}-{end:%H:%M}"
+                  + (f" · utilization under {max_utilization:g}%" if max_utilization is not None else "") + ":\n")
+        if index is None:
+            return header + "• No calendar data\n\n"
+        matches = index.best_assignees(start, end, minutes,
+                                       workload['utilization'] if workload is not None else None, max_utilization)
+        if not len(matches):
+            return header + "• Nobody matches\n\n"
+        lines = [f"• {row.member}: from {row.slot:%H:%M}"
+                 + (f" ({row.utilization:g}% utilized)" if not np.isnan(row.utilization) else "") + "\n"
+                 for row in matches.itertuples()]
+        return header + "".join(lines) + "\n"
     
-    def _generate_support_report(self, connected_tools):
+    def _generate_support_report(self, connected_tools, tool_data, page=0, slot=None):
         if 'zendesk' not in connected_tools:
-            return "❌ Support tool (Zendesk) not connected."
+            yield "❌ Support tool (Zendesk) not connected."
+            return
+        if 'zendesk' not in tool_data:
+            return
         
-        data = self.tool_manager.get_tool_data('zendesk')
-        tickets = data['tickets']
+        data = tool_data['zendesk']
+        tickets, footer = self._ranked_page(data['tickets'], data.get('tickets_rank'), page, "tickets", "most urgent")
+        lines = (label_column(tickets['priority'], TICKET_PRIORITY_EMOJI, "🟢") + " " + tickets['client'].astype(str)
+                 + ": " + tickets['subject'].astype(str)
+                 + " (" + tickets['status'].astype(str) + ")\n") if len(tickets) else []
+        yield "🎫 SUPPORT REPORT\n\n📋 ACTIVE TICKETS:\n" + "".join(lines) + (f"\n{footer}" if footer else "")
         
-        report = "🎫 SUPPORT REPORT\n\n"
-        report += "📋 ACTIVE TICKETS:\n"
-        for ticket in tickets:
-            priority_emoji = "🔴" if ticket['priority'] == 'High' else "🟡" if ticket['priority'] == 'Medium' else "🟢"
-            report += f"{priority_emoji} {ticket['client']}: {ticket['subject']} ({ticket['status']})\n"
+        yield (f"\n📊 METRICS:\n"
+               f"• Response time: {data['avg_response_time']}\n"
+               f"• Satisfaction: {data['customer_satisfaction']}/5.0\n")
+    
+    def _generate_trend_report(self, connected_tools, tool_data, page=0, slot=None):
+        metrics = self.tool_manager.metrics
+        tool_ids = [tool_id for tool_id in self.tool_manager.tools
+                    if tool_id in connected_tools and metrics is not None and metrics.metrics(tool_id)]
+        if not tool_ids:
+            yield "📈 TREND REPORT\n\nNo metric history recorded yet for the connected tools.\n"
+            return
         
-        report += f"\n📊 METRICS:\n"
-        report += f"• Response time: {data['avg_response_time']}\n"
-        report += f"• Satisfaction: {data['customer_satisfaction']}/5.0\n"
+        yield f"📈 TREND REPORT\nChange over the last {', '.join(TREND_WINDOWS)}\n\n"
+        longest = max(TREND_WINDOWS.values())
+        for tool_id in tool_ids:
+            tool = self.tool_manager.tools[tool_id]
+            lines = []
+            for metric in metrics.metrics(tool_id):
+                series = metrics.series(tool_id, metric)
+                now = series.last_time()
+                current = series.value_at(now)
+                changes = []
+                for window, seconds in TREND_WINDOWS.items():
+                    past = series.value_at(now - seconds)
+                    if past:
+                        changes.append(f"{window} {(current - past) / abs(past):+.1%}")
+                spread = series.summary(now - longest, now + 1)
+                lines.append(f"• {metric.replace('_', ' ').capitalize()}: {self._format_metric(current)}"
+                             + "".join(f" · {change}" for change in changes)
+                             + f" (low {self._format_metric(spread['min'])}, high {self._format_metric(spread['max'])})\n")
+            yield f"{tool['icon']} {tool['name'].upper()}:\n" + "".join(lines) + "\n"
+    
+    @staticmethod
+    def _ranked_page(frame: pd.DataFrame, rank: np.ndarray, page: int, noun: str, order: str):
+        """One REPORT_PAGE_SIZE slice of `frame` in its precomputed rank order, plus a footer line
         
-        return report
+        Only the slice is formatted, so a page costs the same at 10 rows or 10 million.
+        """
+        total = len(frame)
+        if rank is None:
+            rank = np.arange(total)
+        start = min(max(page, 0) * REPORT_PAGE_SIZE, max(total - 1, 0) // REPORT_PAGE_SIZE * REPORT_PAGE_SIZE)
+        rows = frame.iloc[rank[start:start + REPORT_PAGE_SIZE]]
+        if total <= REPORT_PAGE_SIZE:
+            return rows, ""
+        return rows, f"Showing {start + 1:,}-{start + len(rows):,} of {total:,} {noun}, {order} first\n"
+    
+    def page_count(self, query: str, connected_tools) -> int:
+        """Pages needed for the longest ranked listing the query's reports would show"""
+        pages = 1
+        for intent, _ in self.router.route(query):
+            tool_id, field = RANKED_LISTS.get(intent, (None, None))
+            if tool_id in connected_tools:
+                try:
+                    rows = len(self.tool_manager.get_tool_data(tool_id).get(field, ()))
+                except Exception:
+                    # An unavailable tool's listing is left out of the report anyway
+                    rows = 0
+                pages = max(pages, -(-rows // REPORT_PAGE_SIZE))
+        return pages
+    
+    @staticmethod
+    def _format_metric(value: float) -> str:
+        return f"{value:,.0f}" if abs(value) >= 100 or float(value).is_integer() else f"{value:.2f}"
     
     def _generate_general_insights(self, connected_tools, query):
-        insights = f"🤖 AI ANALYSIS\n\n"
-        insights += f"Query: {query}\n"
-        insights += f"Connected tools: {len(connected_tools)}\n\n"
-        insights += "Available commands:\n"
-        insights += "• 'executive summary' - comprehensive overview\n"
-        insights += "• 'project status' - project details\n"
-        insights += "• 'financial report' - revenue and expenses\n"
-        insights += "• 'team availability' - workload and schedule\n"
-        insights += "• 'support tickets' - customer issues\n"
-        
-        return insights
+        yield (f"🤖 AI ANALYSIS\n\n"
+               f"Query: {query}\n"
+               f"Connected tools: {len(connected_tools)}\n\n"
+               "Available commands:\n"
+               "• 'executive summary' - comprehensive overview\n"
+               "• 'project status' - project details\n"
+               "• 'financial report' - revenue and expenses\n"
+               "• 'team availability' - workload and schedule\n"
+               "• 'who is free for 2 hours tomorrow afternoon' - open slots, least busy first\n"
+               "• 'support tickets' - customer issues\n"
+               "• 'metric trends' - how each metric moved over the quarter\n")
 
-def main():
-    # Header
-    st.markdown("""
-    <div class="main-header">
-        <h1>🤖 MCP Business Assistant</h1>
-        <p>Connect your business tools and get AI-powered insights</p>
-    </div>
-    """, unsafe_allow_html=True)
+# Reports whose builders only read snapshot payloads and aggregate counters, so a forked worker can build them
+OFFLOAD_INTENTS = {'executive', 'project', 'financial', 'team', 'support'}
+
+class FrozenAggregates:
+    """Read-only stand-in for MaterializedAggregates holding one view() taken in the parent process"""
     
-    # Initialize managers
-    tool_manager = MCPToolManager()
-    query_processor = MCPQueryProcessor(tool_manager)
+    def __init__(self, totals: Dict[str, Any]):
+        self.totals = totals
+        self.version = totals['version']
     
-    # Sidebar - Tool Connections
-    with st.sidebar:
-        st.header("🔗 MCP Tool Connections")
+    def view(self) -> Dict[str, Any]:
+        return dict(self.totals)
+
+def _report_worker_main(conn, processor: 'MCPQueryProcessor', snapshot: 'DataSnapshot'):
+    """Entry point of a forked report worker: build each (intents, tools, page, slot, totals) task it is sent
+    
+    Reports come from `snapshot`, the one the parent labelled this worker with.
+    """
+    tool_manager = processor.tool_manager
+    # Locks held by other parent threads at fork time stay locked here, so don't share objects that take them
+    tool_manager.perf = PerfRecorder(0.0)
+    data = snapshot.data
+    while True:
+        try:
+            intents, connected_tools, page, slot, totals = conn.recv()
+        except (EOFError, OSError):
+            return
+        tool_manager.aggregates = FrozenAggregates(totals)
+        tool_data = {tool_id: data[tool_id] for tool_id in processor._needed_tools(intents, connected_tools)
+                     if tool_id in data}
+        try:
+            conn.send((True, "".join(processor._join_reports(intents, connected_tools, tool_data, page, slot))))
+        except Exception as error:
+            conn.send((False, f"{type(error).__name__}: {error}"))
+
+class ReportProcessPool:
+    """Builds reports in forked worker processes so they don't hold the caller's GIL
+    
+    Workers are forked up front and inherit the current data snapshot
+    (copy-on-write), so a task only carries intents, tool ids and the
+    aggregate counters. A worker whose snapshot is older than the current
+    one is re-forked before its next task. Tasks wait in a bounded queue;
+    cancelling a task that is already running terminates its worker, which
+    is re-forked on demand. Needs the 'fork' start method.
+    """
+    
+    def __init__(self, processor: 'MCPQueryProcessor', workers: int = None, max_pending: int = 32,
+                 poll_interval: float = 0.05):
+        self.processor = processor
+        self.tasks = queue.Queue(max_pending)
+        self.poll_interval = poll_interval
+        self._context = multiprocessing.get_context('fork')
+        self._cancelled = set()
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self.counters = {'submitted': 0, 'completed': 0, 'failed': 0, 'cancelled': 0, 'forks': 0}
+        self._threads = [threading.Thread(target=self._run_worker, name=f"mcp-report-worker-{index}", daemon=True)
+                         for index in range(workers or os.cpu_count() or 1)]
+        for thread in self._threads:
+            thread.start()
+    
+    def submit(self, intents: List[str], connected_tools, page: int = 0, slot=None, timeout: float = None) -> Future:
+        """Queue a report; raises queue.Full if `max_pending` tasks are already waiting after `timeout`"""
+        future = Future()
+        self.tasks.put((future, list(intents), list(connected_tools), page, slot), timeout=timeout)
+        with self._lock:
+            self.counters['submitted'] += 1
+        return future
+    
+    def cancel(self, future: Future):
+        """Drop a queued task, or stop its worker if the task is already running"""
+        with self._lock:
+            self.counters['cancelled'] += 1
+            if not future.cancel() and not future.done():
+                self._cancelled.add(future)
+    
+    def _fork(self):
+        # Pin the snapshot before forking: one published in between must not be mistaken for the worker's
+        snapshot = self.processor.tool_manager.snapshots.current
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(target=_report_worker_main, args=(child_conn, self.processor, snapshot),
+                                        daemon=True)
+        process.start()
+        child_conn.close()
+        with self._lock:
+            self.counters['forks'] += 1
+        return process, parent_conn, snapshot.version
+    
+    @staticmethod
+    def _stop(process, conn):
+        conn.close()
+        process.terminate()
+        process.join()
+    
+    def _run_worker(self):
+        tool_manager = self.processor.tool_manager
+        worker = self._fork()
+        while not self._closed.is_set():
+            try:
+                future, intents, connected_tools, page, slot = self.tasks.get(timeout=self.poll_interval * 10)
+            except queue.Empty:
+                continue
+            if not future.set_running_or_notify_cancel():
+                continue
+            
+            if worker is None or worker[2] != tool_manager.snapshots.current.version:
+                if worker is not None:
+                    self._stop(*worker[:2])
+                worker = self._fork()
+            process, conn, _ = worker
+            
+            try:
+                conn.send((intents, connected_tools, page, slot, tool_manager.aggregates.view()))
+                while not conn.poll(self.poll_interval):
+                    if future in self._cancelled or not process.is_alive():
+                        raise InterruptedError("report task cancelled" if future in self._cancelled
+                                               else "report worker exited")
+                succeeded, result = conn.recv()
+            except (InterruptedError, EOFError, OSError) as error:
+                # The worker may be mid-report; only a fresh fork is safe to reuse
+                self._stop(process, conn)
+                worker = None
+                future.set_exception(error)
+                continue
+            finally:
+                with self._lock:
+                    self._cancelled.discard(future)
+            
+            with self._lock:
+                self.counters['completed' if succeeded else 'failed'] += 1
+            if succeeded:
+                future.set_result(result)
+            else:
+                future.set_exception(RuntimeError(result))
+        
+        if worker is not None:
+            self._stop(*worker[:2])
+    
+    def close(self):
+        self._closed.set()
+        for thread in self._threads:
+            thread.join()
+
+# Buttons above the custom query box; their reports are built before anyone clicks them
+QUICK_ACTIONS = [
+    "Generate executive summary",
+    "Show project status",
+    "Financial report",
+    "Team availability",
+    "Support tickets overview"
+]
+
+class QuickActionPrefetcher:
+    """Builds the quick-action reports in the background so a click finds them in the report cache
+    
+    One job per connected-tool set, remembered with the data version it
+    was built against and the sessions using it. A background thread
+    rebuilds every job whose version has gone stale; discard() drops a
+    session from a tool set as soon as it connects or disconnects a tool,
+    and the job goes once no session uses it. Dropping a job cancels its
+    queued reports, while a report already being built just finishes. The
+    shared report cache is grown to hold every job's reports.
+    """
+    
+    def __init__(self, processor: 'MCPQueryProcessor', queries: List[str] = None, workers: int = 2,
+                 max_jobs: int = 32, interval: float = 1.0):
+        self.processor = processor
+        self.queries = list(QUICK_ACTIONS if queries is None else queries)
+        self.max_jobs = max_jobs
+        self.interval = interval
+        # Prefetched reports come on top of what sessions ask for themselves, so they don't evict each other
+        processor.tool_manager.reports.max_entries += max_jobs * len(self.queries)
+        self._jobs = OrderedDict()
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="mcp-prefetch")
+        self._stop = threading.Event()
+        self._thread = None
+        self.counters = {'submitted': 0, 'cancelled': 0}
+    
+    def prefetch(self, connected_tools, session: str = None):
+        """Queue every quick action for these tools unless it was already queued against the current data"""
+        tools = frozenset(connected_tools)
+        if not tools:
+            return
+        version = self.processor.tool_manager.data_version()
+        with self._lock:
+            self._sessions.setdefault(tools, set()).add(session)
+            job = self._jobs.get(tools)
+            if job is not None and job[0] == version:
+                self._jobs.move_to_end(tools)
+                return
+            self._submit(tools, version)
+            while len(self._jobs) > self.max_jobs:
+                oldest = next(iter(self._jobs))
+                self._cancel(oldest)
+                self._sessions.pop(oldest, None)
+    
+    def _submit(self, tools, version):
+        # Callers hold self._lock
+        if tools in self._jobs:
+            self._cancel(tools)
+        self._jobs[tools] = (version, {query: self._pool.submit(self.processor.process_query, query, sorted(tools))
+                                       for query in self.queries})
+        self.counters['submitted'] += len(self.queries)
+    
+    def discard(self, connected_tools, session: str = None):
+        """Stop prefetching for a session's old tool set; other sessions on the same set keep their job"""
+        tools = frozenset(connected_tools)
+        with self._lock:
+            sessions = self._sessions.get(tools, set())
+            sessions.discard(session)
+            if not sessions:
+                self._sessions.pop(tools, None)
+                if tools in self._jobs:
+                    self._cancel(tools)
+    
+    def _cancel(self, tools):
+        _, futures = self._jobs.pop(tools)
+        for future in futures.values():
+            if future.cancel():
+                self.counters['cancelled'] += 1
+    
+    def wait(self, query: str, connected_tools, timeout: float = None):
+        """Block until a prefetch of `query` that is already running finishes, so a click doesn't build it twice"""
+        with self._lock:
+            job = self._jobs.get(frozenset(connected_tools))
+            future = job[1].get(query) if job is not None else None
+        if future is not None:
+            wait([future], timeout=timeout)
+    
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            version = self.processor.tool_manager.data_version()
+            with self._lock:
+                for tools in [tools for tools, job in self._jobs.items() if job[0] != version]:
+                    self._submit(tools, version)
+    
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="mcp-prefetch-scheduler", daemon=True)
+            self._thread.start()
+        return self
+    
+    def stop(self):
+        self._stop.set()
+
+def parse_query_request(request, known_tools) -> Tuple[str, List[str], int]:
+    """(query, tools, page) from a decoded {"query", "tools"[, "page"]} request; ValueError says what is wrong"""
+    if not isinstance(request, dict):
+        raise ValueError('expected a JSON object with "query" and "tools"')
+    query, tools, page = request.get('query'), request.get('tools', []), request.get('page', 0)
+    if not isinstance(query, str):
+        raise ValueError('"query" must be a string')
+    if not isinstance(tools, list) or not all(isinstance(tool_id, str) for tool_id in tools):
+        raise ValueError('"tools" must be a list of tool ids')
+    unknown = [tool_id for tool_id in tools if tool_id not in known_tools]
+    if unknown:
+        raise ValueError(f"unknown tools: {', '.join(unknown)}")
+    if isinstance(page, bool) or not isinstance(page, int) or page < 0:
+        raise ValueError('"page" must be a non-negative integer')
+    return query, tools, page
+
+class QueryHTTPServer:
+    """Minimal asyncio HTTP/1.1 endpoint over the headless query engine
+    
+    POST /query with {"query": "...", "tools": ["asana", ...], "page": 0} returns
+    {"query", "intents", "page", "report"}; GET /health reports the snapshot version
+    and GET /metrics the hot-path timings in Prometheus text format.
+    Connections are kept alive so clients can pipeline many queries.
+    """
+    
+    def __init__(self, processor: 'MCPQueryProcessor', host: str = '127.0.0.1', port: int = 8600):
+        self.processor = processor
+        self.host = host
+        self.port = port
+    
+    async def dispatch(self, method: str, path: str, body: bytes) -> Tuple[int, Any]:
+        tool_manager = self.processor.tool_manager
+        if method == 'GET' and path == '/health':
+            return 200, {'status': 'ok', 'snapshot_version': tool_manager.snapshots.current.version}
+        if method == 'GET' and path == '/metrics':
+            return 200, tool_manager.perf.export_prometheus()
+        if path != '/query':
+            return 404, {'error': 'not found'}
+        if method != 'POST':
+            return 405, {'error': 'use POST'}
         
+        try:
+            query, tools, page = parse_query_request(json.loads(body), tool_manager.tools)
+        except ValueError as error:
+            return 400, {'error': str(error)}
+        
+        report = await self.processor.process_query_async(query, tools, page)
+        intents = [intent for intent, _ in self.processor.router.route(query)]
+        return 200, {'query': query, 'intents': intents, 'page': page, 'report': report}
+    
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, path = request_line.decode('latin-1').split()[:2]
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+                
+                try:
+                    status, payload = await self.dispatch(method, urlsplit(path).path, body)
+                except Exception as error:
+                    # Answer rather than drop the connection; the client can tell a bug from a bad request
+                    status, payload = 500, {'error': f"{type(error).__name__}: {error}"}
+                if isinstance(payload, str):
+                    data, content_type = payload.encode(), "text/plain; version=0.0.4"
+                else:
+                    data, content_type = json.dumps(payload).encode(), "application/json"
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                writer.write(
+                    f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+                    f"Content-Type: {content_type}\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+    
+    async def serve_forever(self):
+        server = await asyncio.start_server(self.handle, self.host, self.port)
+        async with server:
+            await server.serve_forever()
+
+def run_batch(processor: 'MCPQueryProcessor', source, sink) -> int:
+    """Answer every {"query", "tools"[, "page"]} line of a JSONL stream and write one report per line
+    
+    A malformed line gets an {"line", "error"} record instead of a report
+    and the batch carries on; returns the number of reports written.
+    """
+    count = 0
+    for number, line in enumerate(source, 1):
+        if not line.strip():
+            continue
+        try:
+            query, tools, page = parse_query_request(json.loads(line), processor.tool_manager.tools)
+        except ValueError as error:
+            sink.write(json.dumps({'line': number, 'error': f"{type(error).__name__}: {error}"}) + "\n")
+            continue
+        report = processor.process_query(query, tools, page)
+        sink.write(json.dumps({'query': query, 'tools': tools, 'page': page, 'report': report}) + "\n")
+        count += 1
+    return count
+
+def build_tool_manager() -> MCPToolManager:
+    """Tool manager configured from the environment, with background refresh and event feed running"""
+    connector_url = os.environ.get('MCP_CONNECTOR_URL')
+    synthetic_scale = os.environ.get('MCP_SYNTHETIC_SCALE')
+    if connector_url:
+        tool_manager = MCPToolManager.from_url(connector_url)
+    elif synthetic_scale:
+        tool_manager = MCPToolManager.from_payloads(generate_synthetic_data(int(synthetic_scale)))
+    else:
+        tool_manager = MCPToolManager()
+    # Only mock and synthetic data get seeded trend history; real backends' trends are their own
+    tool_manager.use_metric_store(MetricStore(os.environ.get('MCP_METRICS_DIR', 'mcp_metrics')),
+                                  seed_days=0 if connector_url else 90)
+    tool_manager.scheduler.start()
+    tool_manager.start_event_feed(os.environ.get('MCP_EVENT_FILE'))
+    return tool_manager
+
+def build_report_pool(tool_manager: MCPToolManager):
+    """Report worker processes per MCP_REPORT_WORKERS; None (the default, 0) builds reports in-thread"""
+    workers = int(os.environ.get('MCP_REPORT_WORKERS', '0'))
+    if workers <= 0 or 'fork' not in multiprocessing.get_all_start_methods():
+        return None
+    return ReportProcessPool(MCPQueryProcessor(tool_manager), workers)
+
+def run_cli(argv: List[str]):
+    """Headless entry point: `python MCP.py serve` or `python MCP.py batch IN.jsonl OUT.jsonl`"""
+    parser = argparse.ArgumentParser(prog="MCP.py", description="Headless MCP Business Assistant")
+    commands = parser.add_subparsers(dest='command', required=True)
+    
+    serve = commands.add_parser('serve', help="serve reports over HTTP")
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8600)
+    
+    batch = commands.add_parser('batch', help="answer queries from a JSONL file")
+    batch.add_argument('input', help="JSONL of {\"query\", \"tools\"} objects, or - for stdin")
+    batch.add_argument('output', help="where to write JSONL reports, or - for stdout")
+    
+    args = parser.parse_args(argv)
+    tool_manager = build_tool_manager()
+    processor = MCPQueryProcessor(tool_manager, workers=build_report_pool(tool_manager))
+    
+    if args.command == 'serve':
+        print(f"Serving MCP reports on http://{args.host}:{args.port}", file=sys.stderr)
+        asyncio.run(QueryHTTPServer(processor, args.host, args.port).serve_forever())
+    else:
+        source = sys.stdin if args.input == '-' else open(args.input)
+        sink = sys.stdout if args.output == '-' else open(args.output, 'w')
+        with source, sink:
+            start = time.perf_counter()
+            count = run_batch(processor, source, sink)
+        elapsed = time.perf_counter() - start
+        print(f"Answered {count} queries in {elapsed:.2f}s ({count / elapsed:.0f}/s)", file=sys.stderr)
+
+@st.cache_resource
+def get_tool_manager() -> MCPToolManager:
+    """One tool manager and data snapshot store shared by every session"""
+    return build_tool_manager()
+
+@st.cache_resource
+def get_report_pool():
+    """Report worker processes shared by every session, if MCP_REPORT_WORKERS enables them"""
+    return build_report_pool(get_tool_manager())
+
+@st.cache_resource
+def get_prefetcher() -> QuickActionPrefetcher:
+    """Quick-action prefetcher shared by every session"""
+    return QuickActionPrefetcher(MCPQueryProcessor(get_tool_manager(), workers=get_report_pool())).start()
+
+# Histories kept open at once; each holds a SQLite connection and its newest entries
+HISTORY_CACHE_ENTRIES = 256
+
+@st.cache_resource(max_entries=HISTORY_CACHE_ENTRIES)
+def get_query_history(history_id: str) -> QueryHistory:
+    """The one QueryHistory for `history_id`, shared by every tab that opens it
+    
+    The id is not access-controlled: anyone with a URL carrying it can read
+    and add to that history.
+    """
+    return QueryHistory(os.environ.get('MCP_HISTORY_DB', 'mcp_history.db'), history_id)
+
+def dashboard_panel(tool_id: str, data: Dict[str, Any], totals: Dict[str, Any]) -> Dict[str, list]:
+    """Metrics and progress bars shown in a tool's dashboard expander
+    
+    `totals` is a MaterializedAggregates view, so counters that change
+    events keep current match the executive summary.
+    """
+    metrics, progress = [], []
+    
+    if tool_id == 'asana' and data:
+        projects = data['projects']
+        metrics.append(("Active Projects", len(projects)))
+        for name, percent in zip(projects['name'].tolist(), projects['progress'].tolist()):
+            progress.append((percent / 100, f"{name}: {percent}%"))
+    
+    elif tool_id == 'quickbooks' and data:
+        metrics.append(("Monthly Revenue", f"${data['monthly_revenue']:,}"))
+        metrics.append(("Outstanding", f"${totals['outstanding_invoices']:,}"))
+        metrics.append(("Profit Margin", f"{data['profit_margin']}%"))
+    
+    elif tool_id == 'google_analytics' and data:
+        metrics.append(("Page Views", f"{data['page_views']:,}"))
+        metrics.append(("Conversion Rate", f"{data['conversion_rate']}%"))
+        metrics.append(("Bounce Rate", f"{data['bounce_rate']}%"))
+    
+    elif tool_id == 'zendesk' and data:
+        metrics.append(("Active Tickets", totals['ticket_count']))
+        metrics.append(("Customer Satisfaction", f"{data['customer_satisfaction']}/5.0"))
+    
+    elif tool_id == 'hootsuite' and data:
+        metrics.append(("Total Followers", f"{data['total_followers']:,}"))
+        metrics.append(("Engagement Rate", f"{data['engagement_rate']}%"))
+    
+    elif tool_id == 'hubspot' and data:
+        metrics.append(("Pipeline Value", f"${data['pipeline_value']:,}"))
+        metrics.append(("Deals Won", data['deals_won']))
+        metrics.append(("Conversion Rate", f"{data['conversion_rate']}%"))
+    
+    return {'metrics': metrics, 'progress': progress}
+
+# Dashboard expanders that get a trend chart, and the points sent per line:
+# about one per horizontal pixel of the dashboard column
+CHART_TOOLS = ('google_analytics', 'quickbooks', 'hootsuite', 'hubspot')
+CHART_POINTS = 400
+
+def trend_figure(lines: Dict[str, Tuple[np.ndarray, np.ndarray]], points: int = CHART_POINTS) -> go.Figure:
+    """Line chart of several metrics indexed to 100 at the window start, each downsampled to `points`
+    
+    `lines` maps a label to (epoch-second times, values); pass points=None
+    to send every sample. Hover text shows the real values.
+    """
+    figure = go.Figure()
+    for label, (times, values) in lines.items():
+        if points:
+            keep = downsample_lttb(times, values, points)
+            times, values = times[keep], values[keep]
+        if not len(values):
+            continue
+        base = values[0] or 1.0
+        figure.add_trace(go.Scatter(
+            x=pd.to_datetime(np.asarray(times), unit='s'), y=np.asarray(values) / base * 100,
+            customdata=np.asarray(values), name=label, mode='lines',
+            hovertemplate="%{customdata:,.2f}<extra>" + label + "</extra>"
+        ))
+    figure.update_layout(height=240, margin=dict(l=0, r=0, t=10, b=0),
+                         legend=dict(orientation='h', y=-0.2), yaxis_title="Index (start = 100)")
+    return figure
+
+def trend_chart(metrics: MetricStore, tool_id: str, window: int = max(TREND_WINDOWS.values()),
+                points: int = CHART_POINTS):
+    """Trend figure of a tool's recorded metrics over the last `window` seconds, or None without history"""
+    names = metrics.metrics(tool_id) if metrics is not None else []
+    if not names:
+        return None
+    lines = {}
+    for metric in names:
+        series = metrics.series(tool_id, metric)
+        end = series.last_time() + 1
+        samples = series.range(end - window, end)
+        lines[metric.replace('_', ' ').capitalize()] = (samples['time'], samples['value'])
+    return trend_figure(lines, points)
+
+def render_query_result(placeholder, result: str):
+    placeholder.markdown(f"""
+            <div class="query-result">
+{result}
+            </div>
+            """, unsafe_allow_html=True)
+
+def render_query_stream(placeholder, sections: Iterator[str]) -> str:
+    """Redraw the result box as each report section arrives and return the full text"""
+    placeholder.markdown('<div class="processing">⏳ Processing query using MCP connections...</div>',
+                         unsafe_allow_html=True)
+    parts = []
+    for section in sections:
+        if section:
+            parts.append(section)
+            render_query_result(placeholder, "".join(parts))
+        elif not parts:
+            # Heartbeat while a worker builds the report; redrawing is also where Streamlit stops a stale run
+            placeholder.markdown('<div class="processing">⏳ Processing query using MCP connections...</div>',
+                                 unsafe_allow_html=True)
+    return "".join(parts)
+
+def request_report_page(page: int):
+    """Button callback: show another page of the current report on the next run"""
+    st.session_state.report_page_request = page
+
+def setup_page():
+    """Page config, CSS and per-session state; only needed inside a Streamlit script run"""
+    # Page configuration
+    st.set_page_config(
+        page_title="MCP Business Assistant",
+        page_icon="🤖",
+        layout="wide",
+        initial_sidebar_state="expanded"
+    )
+    
+    st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
+    
+    # Initialize session state
+    if 'connected_tools' not in st.session_state:
+        st.session_state.connected_tools = set()
+    if 'query_history' not in st.session_state:
+        # The history id lives in the URL, so a reload or bookmark picks the same history back up;
+        # it works like a bearer token, so sharing the URL shares the history
+        history_id = st.query_params.get('history')
+        if not history_id or not re.fullmatch(r"[0-9a-f]{32}", history_id):
+            history_id = st.query_params['history'] = uuid.uuid4().hex
+        st.session_state.query_history = get_query_history(history_id)
+
+def prefetch_session() -> str:
+    """This browser session's id in the shared quick-action prefetcher"""
+    return st.session_state.setdefault('prefetch_session', uuid.uuid4().hex)
+
+def toggle_tool(tool_id: str):
+    """Connect/Disconnect callback: redraw only the panels that show connections"""
+    connected_tools = st.session_state.connected_tools
+    # Reports for the old tool set are stale now; start on the new set before the panels redraw
+    get_prefetcher().discard(connected_tools, prefetch_session())
+    if tool_id in connected_tools:
+        connected_tools.discard(tool_id)
+    else:
+        connected_tools.add(tool_id)
+    get_prefetcher().prefetch(connected_tools, prefetch_session())
+    st.rerun(scope=["connections", "dashboard"])
+
+def toggle_recording():
+    """Record timings callback: pause or resume the shared recorder"""
+    get_tool_manager().perf.set_recording(st.session_state.perf_recording)
+
+@st.fragment(key="connections")
+def render_connections(tool_manager: MCPToolManager):
+    """Sidebar connection status and Connect/Disconnect buttons"""
+    with tool_manager.perf.span('rerun', 'connections'):
         # Connection status
         connected_count = len(st.session_state.connected_tools)
         st.metric("Connected Tools", connected_count, len(tool_manager.tools) - connected_count)
@@ -399,7 +3140,7 @@ def main():
         
         # Tool connection interface
         for tool_id, tool_info in tool_manager.tools.items():
-            is_connected = tool_manager.is_connected(tool_id)
+            is_connected = tool_manager.is_connected(tool_id, st.session_state.connected_tools)
             
             with st.container():
                 col1, col2 = st.columns([3, 1])
@@ -413,14 +3154,121 @@ def main():
                     """, unsafe_allow_html=True)
                 
                 with col2:
-                    if st.button("Disconnect" if is_connected else "Connect", 
-                               key=f"btn_{tool_id}",
-                               type="secondary" if is_connected else "primary"):
-                        if is_connected:
-                            st.session_state.connected_tools.discard(tool_id)
-                        else:
-                            st.session_state.connected_tools.add(tool_id)
-                        st.rerun()
+                    st.button("Disconnect" if is_connected else "Connect",
+                              key=f"btn_{tool_id}",
+                              type="secondary" if is_connected else "primary",
+                              on_click=toggle_tool, args=(tool_id,))
+
+@st.fragment(key="dashboard")
+def render_dashboard(tool_manager: MCPToolManager):
+    """Live panels of the connected tools plus the hot-path timings"""
+    with tool_manager.perf.span('rerun', 'dashboard'):
+        # Show data from connected tools
+        if st.session_state.connected_tools:
+            totals = tool_manager.aggregates.view()
+            for tool_id in st.session_state.connected_tools:
+                tool_info = tool_manager.tools[tool_id]
+                try:
+                    data = tool_manager.get_tool_data(tool_id)
+                except Exception:
+                    data = None
+                
+                with st.expander(f"{tool_info['icon']} {tool_info['name']}", expanded=False):
+                    if data is None:
+                        st.warning("Unavailable right now; retrying in the background")
+                        continue
+                    panel = dashboard_panel(tool_id, data, totals)
+                    for label, value in panel['metrics']:
+                        st.metric(label, value)
+                    for fraction, text in panel['progress']:
+                        st.progress(fraction, text)
+                    if tool_id in CHART_TOOLS:
+                        chart = trend_chart(tool_manager.metrics, tool_id)
+                        if chart is not None:
+                            st.plotly_chart(chart, use_container_width=True, key=f"chart_{tool_id}")
+        else:
+            st.info("Connect tools to see live data dashboard")
+        
+        # Hot-path timings, shared by every session in this process
+        with st.expander("⏱️ Performance", expanded=False):
+            perf = tool_manager.perf
+            # Recording is shared by every session: show its current state, change it only on a toggle
+            st.session_state.perf_recording = perf.sample_rate > 0
+            st.toggle("Record timings", key="perf_recording", on_change=toggle_recording)
+            series = perf.snapshot()
+            if series:
+                st.dataframe(pd.DataFrame(series), hide_index=True, use_container_width=True)
+            else:
+                st.caption("No timings recorded yet")
+            export_prometheus, export_json = st.columns(2)
+            with export_prometheus:
+                st.download_button("Prometheus", perf.export_prometheus(), file_name="mcp_metrics.prom",
+                                   mime="text/plain", use_container_width=True)
+            with export_json:
+                st.download_button("JSON", perf.export_json(), file_name="mcp_metrics.json",
+                                   mime="application/json", use_container_width=True)
+
+@st.fragment(key="history")
+def render_history(tool_manager: MCPToolManager):
+    """Query history, newest first; paging through it reruns only this panel"""
+    with tool_manager.perf.span('rerun', 'history'):
+        # Older pages are read back from SQLite
+        history = st.session_state.query_history
+        if len(history):
+            st.subheader("📜 Query History")
+            pages = -(-len(history) // HISTORY_PAGE_SIZE)
+            page = st.number_input("Page", min_value=1, max_value=pages, value=1, key="history_page") if pages > 1 else 1
+            offset = (page - 1) * HISTORY_PAGE_SIZE
+            for i, query_item in enumerate(history.page(offset, HISTORY_PAGE_SIZE)):
+                number = len(history) - offset - i
+                with st.expander(f"Query {number}", expanded=False):
+                    st.write(f"**Query:** {query_item['query']}")
+                    st.write(f"**Time:** {query_item['timestamp'].strftime('%H:%M:%S')}")
+                    st.text_area("Result:", query_item['result'], height=100, key=f"history_{number}")
+
+def render_app():
+    # Header
+    st.markdown("""
+    <div class="main-header">
+        <h1>🤖 MCP Business Assistant</h1>
+        <p>Connect your business tools and get AI-powered insights</p>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    # Shared managers; the session only keeps its own connected_tools
+    tool_manager = get_tool_manager()
+    query_processor = MCPQueryProcessor(tool_manager, workers=get_report_pool())
+    
+    # Sidebar - Tool Connections
+    with st.sidebar:
+        st.header("🔗 MCP Tool Connections")
+        render_connections(tool_manager)
+        
+        # Data snapshot shared by all sessions
+        st.markdown("---")
+        snapshot = tool_manager.snapshots.current
+        st.caption(f"Data snapshot v{snapshot.version} · loaded {snapshot.created_at.strftime('%H:%M:%S')}")
+        if st.button("🔄 Refresh data", key="refresh_snapshot", use_container_width=True):
+            tool_manager.refresh_snapshot()
+            st.rerun()
+        
+        with st.expander("🗄️ Cache", expanded=False):
+            cache_stats = tool_manager.cache.stats()
+            st.metric("Hit Rate", f"{cache_stats['hit_rate']:.0%}")
+            st.caption(f"{cache_stats['hits']} fresh · {cache_stats['stale_hits']} stale · "
+                       f"{cache_stats['misses']} misses · {cache_stats['evictions']} evictions")
+            st.dataframe(pd.DataFrame(cache_stats['entries']), hide_index=True, use_container_width=True)
+            if cache_stats['wanted']:
+                st.caption("Not loaded yet: " + ", ".join(tool_manager.tools[tool_id]['name'] for tool_id in cache_stats['wanted']))
+            upstream = tool_manager.upstream_stats()
+            open_circuits = [tool_id for tool_id, state in upstream['breakers'].items() if state != 'closed']
+            st.caption(f"Upstream: {upstream['calls']} fetches · {upstream['shared']} coalesced · "
+                       f"{upstream['rejected']} rejected by open circuits")
+            if open_circuits:
+                st.warning("Circuit open: " + ", ".join(tool_manager.tools[tool_id]['name'] for tool_id in open_circuits))
+            report_stats = tool_manager.reports.stats()
+            st.caption(f"Reports: {report_stats['hits']} reused · {report_stats['misses']} built · "
+                       f"{report_stats['size']} cached")
         
         # Security info
         st.markdown("---")
@@ -434,25 +3282,15 @@ def main():
         
         # Predefined queries
         st.subheader("Quick Actions")
-        quick_actions = [
-            "Generate executive summary",
-            "Show project status",
-            "Financial report",
-            "Team availability",
-            "Support tickets overview"
-        ]
-        
-        cols = st.columns(len(quick_actions))
-        for i, action in enumerate(quick_actions):
+        prefetcher = get_prefetcher()
+        prefetcher.prefetch(st.session_state.connected_tools, prefetch_session())
+        
+        pending_query = None
+        cols = st.columns(len(QUICK_ACTIONS))
+        for i, action in enumerate(QUICK_ACTIONS):
             with cols[i]:
                 if st.button(action, key=f"quick_{i}", use_container_width=True):
-                    with st.spinner("Processing query..."):
-                        result = query_processor.process_query(action)
-                        st.session_state.query_history.append({
-                            'query': action,
-                            'result': result,
-                            'timestamp': datetime.now()
-                        })
+                    pending_query = action
         
         # Custom query
         st.subheader("Custom Query")
@@ -461,69 +3299,44 @@ def main():
         
         if st.button("🚀 Ask AI", type="primary", use_container_width=True):
             if user_query:
-                with st.spinner("Processing your query using MCP connections..."):
-                    time.sleep(1)  # Simulate processing
-                    result = query_processor.process_query(user_query)
-                    st.session_state.query_history.append({
-                        'query': user_query,
-                        'result': result,
-                        'timestamp': datetime.now()
-                    })
-        
-        # Query results
-        if st.session_state.query_history:
+                pending_query = user_query
+        
+        # Query results; a page turn re-runs the shown query without adding it to the history again
+        shown = st.session_state.get('shown_report')
+        page_request = st.session_state.pop('report_page_request', None)
+        if pending_query or (page_request is not None and shown):
+            query, page = (pending_query, 0) if pending_query else (shown['query'], page_request)
             st.subheader("🤖 AI Response")
-            latest_query = st.session_state.query_history[-1]
-            
-            st.markdown(f"""
-            <div class="query-result">
-{latest_query['result']}
-            </div>
-            """, unsafe_allow_html=True)
+            if pending_query:
+                # A quick action whose prefetch is still running: join it instead of building the report again
+                prefetcher.wait(query, st.session_state.connected_tools, timeout=DEFAULT_TOOL_DEADLINE)
+            sections = query_processor.stream_query(query, st.session_state.connected_tools, page)
+            result = render_query_stream(st.empty(), sections)
+            if pending_query:
+                st.session_state.query_history.append(query, result)
+            shown = st.session_state.shown_report = {'query': query, 'page': page, 'result': result}
+        elif shown or len(st.session_state.query_history):
+            st.subheader("🤖 AI Response")
+            render_query_result(st.empty(), (shown or st.session_state.query_history.latest())['result'])
+        
+        if shown:
+            pages = query_processor.page_count(shown['query'], st.session_state.connected_tools)
+            if pages > 1:
+                page = min(shown['page'], pages - 1)
+                previous_col, position_col, next_col = st.columns([1, 2, 1])
+                with previous_col:
+                    st.button("◀ Previous", key="report_previous", disabled=page == 0, use_container_width=True,
+                              on_click=request_report_page, args=(page - 1,))
+                with position_col:
+                    st.caption(f"Page {page + 1} of {pages:,}")
+                with next_col:
+                    st.button("Next ▶", key="report_next", disabled=page >= pages - 1, use_container_width=True,
+                              on_click=request_report_page, args=(page + 1,))
     
     with col2:
         st.header("📊 Dashboard")
-        
-        # Show data from connected tools
-        if st.session_state.connected_tools:
-            for tool_id in st.session_state.connected_tools:
-                tool_info = tool_manager.tools[tool_id]
-                data = tool_manager.get_tool_data(tool_id)
-                
-                with st.expander(f"{tool_info['icon']} {tool_info['name']}", expanded=False):
-                    if tool_id == 'asana' and data:
-                        st.metric("Active Projects", len(data['projects']))
-                        for project in data['projects']:
-                            st.progress(project['progress'] / 100, f"{project['name']}: {project['progress']}%")
-                    
-                    elif tool_id == 'quickbooks' and data:
-                        st.metric("Monthly Revenue", f"${data['monthly_revenue']:,}")
-                        st.metric("Outstanding", f"${data['outstanding_invoices']:,}")
-                        st.metric("Profit Margin", f"{data['profit_margin']}%")
-                    
-                    elif tool_id == 'google_analytics' and data:
-                        st.metric("Page Views", f"{data['page_views']:,}")
-                        st.metric("Conversion Rate", f"{data['conversion_rate']}%")
-                        st.metric("Bounce Rate", f"{data['bounce_rate']}%")
-                    
-                    elif tool_id == 'zendesk' and data:
-                        st.metric("Active Tickets", len(data['tickets']))
-                        st.metric("Customer Satisfaction", f"{data['customer_satisfaction']}/5.0")
-                    
-                    elif tool_id == 'hootsuite' and data:
-                        st.metric("Total Followers", f"{data['total_followers']:,}")
-                        st.metric("Engagement Rate", f"{data['engagement_rate']}%")
-        else:
-            st.info("Connect tools to see live data dashboard")
-        
-        # Query history
-        if st.session_state.query_history:
-            st.subheader("📜 Query History")
-            for i, query_item in enumerate(reversed(st.session_state.query_history[-5:])):
-                with st.expander(f"Query {len(st.session_state.query_history) - i}", expanded=False):
-                    st.write(f"**Query:** {query_item['query']}")
-                    st.write(f"**Time:** {query_item['timestamp'].strftime('%H:%M:%S')}")
-                    st.text_area("Result:", query_item['result'], height=100, key=f"history_{i}")
+        render_dashboard(tool_manager)
+        render_history(tool_manager)
 
     # Footer
     st.markdown("---")
@@ -538,5 +3351,14 @@ def main():
     secure data access, and AI that understands your entire business context.
     """)
 
+def main():
+    setup_page()
+    # Covers full script runs, including runs cut short by st.rerun(); fragment reruns time themselves
+    with get_tool_manager().perf.span('rerun', 'app'):
+        render_app()
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    if len(sys.argv) > 1 and sys.argv[1] in ('serve', 'batch'):
+        run_cli(sys.argv[1:])
+    else:
+        main()
\ No newline at end of file
@@ -0,0 +1,1162 @@
+"""Performance benchmarks for the MCP Business Assistant
+
+Run `python benchmarks.py <benchmark> [options]`. Every benchmark prints
+its results as one JSON object so runs can be diffed and archived.
+`python benchmarks.py suite --baseline FILE` also compares the report
+paths against a stored run and exits non-zero on regressions.
+"""
+import argparse
+import asyncio
+import heapq
+import http.client
+import io
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import timeit
+import tracemalloc
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.testing.v1 import AppTest
+from websockets.asyncio.client import connect
+
+from MCP import (BREAKER_THRESHOLD, CHART_POINTS, CONNECTOR_CONCURRENCY, QUICK_ACTIONS, REPORT_PAGE_SIZE,
+                 TICKET_PRIORITY_EMOJI, TICKET_PRIORITY_RANK, AvailabilityIndex, IntentRouter, MCPQueryProcessor,
+                 MCPToolManager, MaterializedAggregates, MetricSeries, MockToolServer, QueryHTTPServer, ReportCache,
+                 ReportProcessPool, WORKLOAD_EMOJI, compute_aggregates, dashboard_panel, downsample_lttb,
+                 generate_synthetic_data, label_column, rank_tickets, run_batch, trend_figure)
+
+CUSTOM_QUERIES = ["What's our team workload this week?", "revenue and support tickets",
+                  "Which projects are behind schedule?", "How did conversion rate trend this quarter?",
+                  "Who is free for 2 hours tomorrow afternoon?"]
+APP_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'MCP.py')
+
+
+def bench_connectors(scale: int = 100, clients: int = 8, rounds: int = 50):
+    """Fetch every tool over pooled HTTP from the local stand-in server
+    
+    Concurrent fetches of one tool share a request, so `http_requests` is
+    lower than the number of tool fetches.
+    """
+    server = MockToolServer(MCPToolManager().mock_data, scale=scale).start()
+    manager = MCPToolManager.from_url(server.url, pool_size=clients)
+    
+    def session(_):
+        for _ in range(rounds):
+            for tool_id in manager.tools:
+                # Past the TTL cache and snapshot, so every fetch goes to the connector
+                manager.fetch_upstream(tool_id)
+    
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        list(pool.map(session, range(clients)))
+    elapsed = time.perf_counter() - start
+    server.stop()
+    
+    pools = [connector.pool.stats for connector in manager.connectors.values()]
+    requests = sum(stats['requests'] for stats in pools)
+    opened = sum(stats['connections_opened'] for stats in pools)
+    return {
+        'benchmark': 'connectors',
+        'scale': scale,
+        'clients': clients,
+        'http_requests': requests,
+        'connections_opened': opened,
+        'connection_reuse': round(1 - opened / requests, 4) if requests else 0.0,
+        'requests_per_second': round(requests / elapsed, 1),
+        'tool_fetches_per_second': round(clients * rounds * len(manager.tools) / elapsed, 1),
+        'seconds': round(elapsed, 3)
+    }
+
+
+def bench_snapshot(sessions: int = 200, reruns: int = 20):
+    """Compare building managers on every rerun with one shared snapshot store"""
+    
+    def per_rerun():
+        manager = MCPToolManager()
+        MCPQueryProcessor(manager)
+        manager._fetch_pool.shutdown()
+        return manager
+    
+    shared_manager = MCPToolManager()
+    
+    def shared():
+        MCPQueryProcessor(shared_manager)
+        return shared_manager
+    
+    results = {'benchmark': 'snapshot', 'sessions': sessions, 'reruns': reruns}
+    for name, rerun in (('per_rerun', per_rerun), ('shared', shared)):
+        start = time.perf_counter()
+        for _ in range(reruns):
+            rerun()
+        results[f'{name}_latency_us'] = round((time.perf_counter() - start) / reruns * 1e6, 1)
+        
+        # Memory held while every session is mid-rerun at the same moment
+        tracemalloc.start()
+        live = [(rerun(), {'asana', 'zendesk'}) for _ in range(sessions)]
+        results[f'{name}_peak_kib'] = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+        tracemalloc.stop()
+        del live
+    return results
+
+
+def bench_routing(vocab_sizes=(100, 10_000, 1_000_000), intents: int = 50, queries: int = 2000, seed: int = 7):
+    """Routing cost per query for the compiled index versus sequential substring scans"""
+    rng = random.Random(seed)
+    results = {'benchmark': 'routing', 'intents': intents, 'sizes': []}
+    
+    for size in vocab_sizes:
+        keywords = {f'intent{i}': {} for i in range(intents)}
+        for word in range(size):
+            keywords[f'intent{word % intents}'][f'kw{word}'] = 1.0
+        vocabulary = [f'kw{word}' for word in range(size)]
+        batch = [' '.join(rng.choice(vocabulary) if rng.random() < 0.3 else 'the' for _ in range(8))
+                 for _ in range(queries)]
+        
+        start = time.perf_counter()
+        router = IntentRouter(keywords)
+        compile_seconds = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        for query in batch:
+            router.route(query)
+        compiled_us = (time.perf_counter() - start) / len(batch) * 1e6
+        
+        # The old process_query: one `any(word in query)` scan per intent
+        sample = batch[:max(1, min(len(batch), 200_000 // size))]
+        start = time.perf_counter()
+        for query in sample:
+            for words in keywords.values():
+                if any(word in query for word in words):
+                    break
+        scan_us = (time.perf_counter() - start) / len(sample) * 1e6
+        
+        results['sizes'].append({
+            'vocabulary': size,
+            'compile_seconds': round(compile_seconds, 3),
+            'compiled_us_per_query': round(compiled_us, 2),
+            'substring_scan_us_per_query': round(scan_us, 2)
+        })
+    return results
+
+
+def _timed(function, *args):
+    start = time.perf_counter()
+    function(*args)
+    return round((time.perf_counter() - start) * 1000, 2)
+
+
+def bench_aggregates(sizes=(10_000, 1_000_000, 10_000_000), loop_limit: int = 1_000_000, seed: int = 7):
+    """Full recompute of the summary aggregates and workload labels over columnar frames versus dict loops"""
+    rng = np.random.default_rng(seed)
+    results = {'benchmark': 'aggregates', 'sizes': []}
+    
+    for size in sizes:
+        projects = pd.DataFrame({
+            'status': pd.Categorical.from_codes(rng.integers(0, 3, size), ['On Track', 'Behind Schedule', 'Ahead of Schedule']),
+            'progress': rng.integers(0, 101, size)
+        })
+        tickets = pd.DataFrame({
+            'priority': pd.Categorical.from_codes(rng.integers(0, 3, size), ['High', 'Medium', 'Low'])
+        })
+        availability = pd.Series(pd.Categorical.from_codes(rng.integers(0, 3, size), ['Overloaded', 'Busy', 'Available']))
+        tool_data = {
+            'asana': {'projects': projects},
+            'zendesk': {'tickets': tickets, 'customer_satisfaction': 4.6}
+        }
+        
+        row = {
+            'rows': size,
+            'summary_ms': _timed(compute_aggregates, tool_data),
+            'workload_labels_ms': _timed(label_column, availability, WORKLOAD_EMOJI, '🟢')
+        }
+        
+        if size <= loop_limit:
+            project_records = projects.astype({'status': object}).to_dict('records')
+            ticket_records = tickets.astype({'priority': object}).to_dict('records')
+            levels = availability.astype(object).tolist()
+            
+            def loop_summary():
+                sum(p['progress'] for p in project_records) / len(project_records)
+                sum(1 for p in project_records if p['status'] == 'On Track')
+                sum(1 for p in project_records if p['status'] == 'Behind Schedule')
+                sum(1 for t in ticket_records if t['priority'] == 'High')
+                [p for p in project_records if p['status'] == 'Behind Schedule']
+            
+            def loop_labels():
+                ["🔴" if level == 'Overloaded' else "🟡" if level == 'Busy' else "🟢" for level in levels]
+            
+            row['loop_summary_ms'] = _timed(loop_summary)
+            row['loop_workload_labels_ms'] = _timed(loop_labels)
+        results['sizes'].append(row)
+    return results
+
+
+def bench_events(events: int = 2_000_000, projects: int = 10_000, tickets: int = 10_000, seed: int = 7):
+    """Replay a change-event stream into the materialized aggregates and check them against a recompute"""
+    rng = random.Random(seed)
+    statuses = ['On Track', 'Behind Schedule', 'Ahead of Schedule']
+    priorities = ['High', 'Medium', 'Low']
+    tool_data = {
+        'asana': {'projects': pd.DataFrame({
+            'name': [f'project-{i}' for i in range(projects)],
+            'status': pd.Categorical([rng.choice(statuses) for _ in range(projects)]),
+            'progress': [rng.randint(0, 100) for _ in range(projects)]
+        })},
+        'zendesk': {'tickets': pd.DataFrame({
+            'id': range(tickets),
+            'priority': pd.Categorical([rng.choice(priorities) for _ in range(tickets)])
+        })},
+        'quickbooks': {'outstanding_invoices': 23400}
+    }
+    aggregates = MaterializedAggregates(tool_data)
+    
+    next_project, next_ticket, next_invoice = projects, tickets, 0
+    stream = []
+    for _ in range(events):
+        kind = rng.random()
+        if kind < 0.25:
+            stream.append({'type': 'ticket_created', 'id': next_ticket, 'priority': rng.choice(priorities)})
+            next_ticket += 1
+        elif kind < 0.45:
+            stream.append({'type': 'ticket_closed', 'id': rng.randrange(next_ticket)})
+        elif kind < 0.55:
+            stream.append({'type': 'ticket_priority_changed', 'id': rng.randrange(next_ticket), 'priority': rng.choice(priorities)})
+        elif kind < 0.75:
+            stream.append({'type': 'project_progress_changed', 'id': f'project-{rng.randrange(next_project)}',
+                           'progress': rng.randint(0, 100)})
+        elif kind < 0.82:
+            stream.append({'type': 'project_status_changed', 'id': f'project-{rng.randrange(next_project)}',
+                           'status': rng.choice(statuses)})
+        elif kind < 0.86:
+            stream.append({'type': 'project_created', 'id': f'project-{next_project}',
+                           'status': rng.choice(statuses), 'progress': 0})
+            next_project += 1
+        elif kind < 0.88:
+            stream.append({'type': 'project_closed', 'id': f'project-{rng.randrange(next_project)}'})
+        elif kind < 0.95:
+            stream.append({'type': 'invoice_issued', 'id': next_invoice, 'amount': rng.randint(100, 5000)})
+            next_invoice += 1
+        else:
+            stream.append({'type': 'invoice_paid', 'id': rng.randrange(max(next_invoice, 1))})
+    
+    start = time.perf_counter()
+    for event in stream:
+        aggregates.apply(event)
+    elapsed = time.perf_counter() - start
+    
+    # Independent replay into plain tables, then the vectorized recompute the aggregates replace
+    final_projects = dict(zip(tool_data['asana']['projects']['name'],
+                              zip(tool_data['asana']['projects']['status'], tool_data['asana']['projects']['progress'])))
+    final_tickets = dict(zip(tool_data['zendesk']['tickets']['id'], tool_data['zendesk']['tickets']['priority']))
+    open_invoices, outstanding = {}, tool_data['quickbooks']['outstanding_invoices']
+    for event in stream:
+        kind, key = event['type'], event['id']
+        if kind == 'ticket_created':
+            final_tickets.setdefault(key, event['priority'])
+        elif kind == 'ticket_closed':
+            final_tickets.pop(key, None)
+        elif kind == 'ticket_priority_changed' and key in final_tickets:
+            final_tickets[key] = event['priority']
+        elif kind == 'project_created':
+            final_projects.setdefault(key, (event['status'], event['progress']))
+        elif kind == 'project_closed':
+            final_projects.pop(key, None)
+        elif kind == 'project_progress_changed' and key in final_projects:
+            final_projects[key] = (final_projects[key][0], event['progress'])
+        elif kind == 'project_status_changed' and key in final_projects:
+            final_projects[key] = (event['status'], final_projects[key][1])
+        elif kind == 'invoice_issued' and key not in open_invoices:
+            open_invoices[key] = event['amount']
+            outstanding += event['amount']
+        elif kind == 'invoice_paid' and key in open_invoices:
+            outstanding -= open_invoices.pop(key)
+    final_data = {
+        'asana': {'projects': pd.DataFrame(list(final_projects.values()), columns=['status', 'progress'])},
+        'zendesk': {'tickets': pd.DataFrame({'priority': list(final_tickets.values())})},
+        'quickbooks': {'outstanding_invoices': outstanding}
+    }
+    
+    start = time.perf_counter()
+    expected = compute_aggregates(final_data)
+    recompute_ms = (time.perf_counter() - start) * 1000
+    maintained = aggregates.view()
+    del maintained['version']
+    consistent = maintained == expected
+    
+    start = time.perf_counter()
+    for _ in range(1000):
+        aggregates.view()
+    view_us = (time.perf_counter() - start) / 1000 * 1e6
+    
+    return {
+        'benchmark': 'events',
+        'events': events,
+        'applied': aggregates.counters['applied'],
+        'ignored': aggregates.counters['ignored'],
+        'events_per_second': round(events / elapsed),
+        'us_per_event': round(elapsed / events * 1e6, 3),
+        'read_us': round(view_us, 2),
+        'full_recompute_ms': round(recompute_ms, 2),
+        'consistent': consistent
+    }
+
+
+def bench_headless(clients: int = 16, requests_per_client: int = 500, batch_size: int = 20_000, seed: int = 7):
+    """Queries per second through the batch CLI path and the asyncio HTTP endpoint"""
+    rng = random.Random(seed)
+    manager = MCPToolManager()
+    # Every request builds its report; a warm report cache would only time dict lookups
+    manager.reports = ReportCache(max_entries=0)
+    processor = MCPQueryProcessor(manager)
+    tools = list(manager.tools)
+    requests = [{'query': rng.choice(QUICK_ACTIONS), 'tools': rng.sample(tools, 4)} for _ in range(batch_size)]
+    
+    source = io.StringIO(''.join(json.dumps(request) + '\n' for request in requests))
+    start = time.perf_counter()
+    run_batch(processor, source, io.StringIO())
+    batch_qps = batch_size / (time.perf_counter() - start)
+    
+    server = QueryHTTPServer(processor, port=0)
+    loop = asyncio.new_event_loop()
+    listening = loop.run_until_complete(asyncio.start_server(server.handle, '127.0.0.1', 0))
+    port = listening.sockets[0].getsockname()[1]
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    
+    def client(index):
+        conn = http.client.HTTPConnection('127.0.0.1', port)
+        for i in range(requests_per_client):
+            body = json.dumps(requests[(index * requests_per_client + i) % batch_size])
+            conn.request('POST', '/query', body, {'Content-Type': 'application/json'})
+            conn.getresponse().read()
+        conn.close()
+    
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        list(pool.map(client, range(clients)))
+    http_qps = clients * requests_per_client / (time.perf_counter() - start)
+    loop.call_soon_threadsafe(listening.close)
+    
+    return {
+        'benchmark': 'headless',
+        'batch_queries': batch_size,
+        'batch_queries_per_second': round(batch_qps),
+        'http_clients': clients,
+        'http_queries_per_second': round(http_qps)
+    }
+
+
+def bench_metrics(years: int = 3, chunk_days: int = 1, repeat: int = 20, seed: int = 7):
+    """Append years of per-minute samples to a memory-mapped series, then time range scans and rollups"""
+    rng = np.random.default_rng(seed)
+    minutes = years * 365 * 1440
+    times = np.arange(minutes, dtype=np.int64) * 60
+    values = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, minutes)))
+    
+    with tempfile.TemporaryDirectory() as directory:
+        series = MetricSeries(directory)
+        chunk = chunk_days * 1440
+        start = time.perf_counter()
+        for offset in range(0, minutes, chunk):
+            series.append(times[offset:offset + chunk], values[offset:offset + chunk])
+        append_seconds = time.perf_counter() - start
+        
+        end = int(times[-1]) + 1
+        cases = {
+            'raw_day': lambda: series.range(end - 86400, end)['value'].mean(),
+            'raw_30d': lambda: series.range(end - 30 * 86400, end)['value'].mean(),
+            'raw_all': lambda: series.range(0, end)['value'].mean(),
+            'hour_all': lambda: series.range(0, end, 'hour')['sum'].sum(),
+            'day_all': lambda: series.range(0, end, 'day')['sum'].sum(),
+            'summary_quarter': lambda: series.summary(end - 90 * 86400, end),
+            'summary_all': lambda: series.summary(0, end),
+            'value_at': lambda: series.value_at(end // 2)
+        }
+        scans = {}
+        for name, case in cases.items():
+            best = float('inf')
+            for _ in range(repeat):
+                case_start = time.perf_counter()
+                case()
+                best = min(best, time.perf_counter() - case_start)
+            scans[f"{name}_ms"] = round(best * 1000, 3)
+        consistent = bool(np.isclose(series.range(0, end, 'day')['sum'].sum(), values.sum()))
+    
+    return {
+        'benchmark': 'metrics',
+        'samples': minutes,
+        'append_samples_per_second': round(minutes / append_seconds),
+        **scans,
+        'rollups_consistent': consistent
+    }
+
+
+def bench_charts(sizes=(10_000, 1_000_000, 10_000_000), points: int = CHART_POINTS, raw_limit: int = 1_000_000,
+                 seed: int = 7):
+    """Figure build/serialize time and payload size of trend charts with and without LTTB downsampling
+    
+    The serialized figure is what Streamlit sends over the websocket; browser
+    render time grows with the same point count.
+    """
+    rng = np.random.default_rng(seed)
+    # Plotly loads its validators on first use; keep that out of the timings
+    trend_figure({'warm-up': (np.arange(10), np.ones(10))}).to_json()
+    results = []
+    for size in sizes:
+        times = np.arange(size, dtype=np.int64) * 60
+        values = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, size)))
+        
+        start = time.perf_counter()
+        downsample_lttb(times, values, points)
+        downsample_ms = (time.perf_counter() - start) * 1000
+        
+        start = time.perf_counter()
+        payload = trend_figure({'metric': (times, values)}, points).to_json()
+        figure_ms = (time.perf_counter() - start) * 1000
+        result = {
+            'points': size,
+            'downsample_ms': round(downsample_ms, 2),
+            'figure_ms': round(figure_ms, 2),
+            'payload_kb': round(len(payload) / 1024, 1)
+        }
+        
+        # Sending every point gets slow and large fast, so only try it up to raw_limit
+        if size <= raw_limit:
+            start = time.perf_counter()
+            raw_payload = trend_figure({'metric': (times, values)}, None).to_json()
+            result['raw_figure_ms'] = round((time.perf_counter() - start) * 1000, 2)
+            result['raw_payload_kb'] = round(len(raw_payload) / 1024, 1)
+        results.append(result)
+    return {'benchmark': 'charts', 'sent_points': points, 'results': results}
+
+
+def bench_stampede(sessions: int = 500, latency: float = 0.05, rounds: int = 10):
+    """Hundreds of sessions asking for the executive summary tools at once, against a slow local stub
+    
+    Checks that concurrent identical fetches share one upstream request per
+    tool, and that a failing upstream trips its circuit breaker instead of
+    absorbing a retry storm.
+    """
+    tools = ['asana', 'quickbooks', 'zendesk', 'google_analytics']
+    server = MockToolServer(MCPToolManager().mock_data, latency=latency).start()
+    try:
+        manager = MCPToolManager.from_url(server.url, pool_size=CONNECTOR_CONCURRENCY)
+        
+        def stampede(fetch, tool_ids):
+            barrier = threading.Barrier(sessions)
+            errors = []
+            
+            def session():
+                barrier.wait()
+                for tool_id in tool_ids:
+                    try:
+                        fetch(tool_id)
+                    except OSError:
+                        errors.append(tool_id)
+            
+            threads = [threading.Thread(target=session) for _ in range(sessions)]
+            before = server.request_count
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            return server.request_count - before, time.perf_counter() - start, len(errors)
+        
+        # What one fetch of each tool costs upstream (paginated tools take several requests)
+        before = server.request_count
+        for tool_id in tools:
+            manager.fetch_upstream(tool_id)
+        single_requests = server.request_count - before
+        
+        manager.cache.clear()
+        coalesced_requests, coalesced_seconds, _ = stampede(manager.get_tool_data, tools)
+        # The same stampede straight at the connectors, as every session fetching on its own would do
+        uncoalesced_requests, uncoalesced_seconds, uncoalesced_errors = stampede(lambda tool_id: manager.connectors[tool_id].fetch(), tools)
+        
+        # Upstream goes down: repeated stampedes should stop reaching it once the breaker opens
+        server.failing.add('zendesk')
+        failing_requests = 0
+        for _ in range(rounds):
+            manager.cache.clear()
+            requests, _, failed_sessions = stampede(manager.get_tool_data, ['zendesk'])
+            failing_requests += requests
+        breaker = manager.breakers['zendesk']
+    finally:
+        server.stop()
+    
+    passed = (coalesced_requests <= 2 * single_requests and breaker.state == 'open'
+              and failing_requests <= BREAKER_THRESHOLD)
+    return {
+        'benchmark': 'stampede',
+        'sessions': sessions,
+        'upstream_requests_single_fetch': single_requests,
+        'upstream_requests_coalesced': coalesced_requests,
+        'coalesced_seconds': round(coalesced_seconds, 3),
+        'upstream_requests_uncoalesced': uncoalesced_requests,
+        'uncoalesced_seconds': round(uncoalesced_seconds, 3),
+        'uncoalesced_failed_fetches': uncoalesced_errors,
+        'failing_rounds': rounds,
+        'upstream_requests_while_failing': failing_requests,
+        'failed_sessions_last_round': failed_sessions,
+        'breaker_state': breaker.state,
+        'breaker_rejections': breaker.counters['rejected'],
+        'passed': passed
+    }
+
+
+def bench_deadlines(latency: float = 0.02, slow: float = 0.5, deadline: float = 0.2):
+    """Executive summary with one tool slower than its deadline, through the streaming and asyncio paths
+    
+    Checks that the slow tool is left out of the report instead of holding
+    it up, that the PARTIAL REPORT notice names it, that the partial report
+    is not cached, and that the full report is cached once every tool
+    answers in time.
+    """
+    tools = ['asana', 'quickbooks', 'zendesk', 'google_analytics']
+    query = "Generate executive summary"
+    server = MockToolServer(MCPToolManager().mock_data, latency=latency).start()
+    try:
+        manager = MCPToolManager.from_url(server.url)
+        manager.deadlines = {tool_id: deadline for tool_id in manager.tools}
+        processor = MCPQueryProcessor(manager)
+        slow_name = manager.tools['zendesk']['name']
+        
+        def run(answer):
+            # Let fetches left behind by the previous run land, then start cold
+            time.sleep(slow + latency)
+            manager.cache.clear()
+            cached = manager.reports.stats()['size']
+            start = time.perf_counter()
+            report = answer()
+            elapsed = time.perf_counter() - start
+            notice = next((line for line in report.splitlines() if 'PARTIAL REPORT' in line), '')
+            return {
+                'seconds': round(elapsed, 3),
+                'partial': bool(notice),
+                'names_slow_tool': slow_name in notice,
+                'slow_section_left_out': '🎫 SUPPORT' not in report,
+                'cached': manager.reports.stats()['size'] > cached
+            }
+        
+        server.slow['zendesk'] = slow
+        results = {
+            'stream': run(lambda: processor.process_query(query, tools)),
+            'async': run(lambda: asyncio.run(processor.process_query_async(query, tools)))
+        }
+        server.slow.clear()
+        results['all_in_time'] = run(lambda: processor.process_query(query, tools))
+    finally:
+        server.stop()
+    
+    passed = (all(result['partial'] and result['names_slow_tool'] and result['slow_section_left_out']
+                  and not result['cached'] and result['seconds'] < slow
+                  for result in (results['stream'], results['async']))
+              and not results['all_in_time']['partial'] and results['all_in_time']['cached'])
+    return {
+        'benchmark': 'deadlines',
+        'latency_seconds': latency,
+        'slow_tool_seconds': slow,
+        'deadline_seconds': deadline,
+        **results,
+        'passed': passed
+    }
+
+
+def bench_offload(scale: int = 50_000, queries: int = 8, workers: int = None, tick: float = 0.005):
+    """Support reports on a large dataset, built in-thread vs in forked workers, while a UI thread ticks
+    
+    The ticker stands in for the Streamlit script thread of another session:
+    its worst delay shows how much report building stalls it through the GIL.
+    """
+    manager = MCPToolManager.from_payloads(generate_synthetic_data(scale))
+    # Every query must build its report; no reuse from the report cache
+    manager.reports = ReportCache(max_entries=0)
+    workers = workers or os.cpu_count() or 1
+    pool = ReportProcessPool(MCPQueryProcessor(manager), workers)
+    tools = ['zendesk', 'asana', 'quickbooks', 'google_analytics']
+    
+    def run(processor):
+        stalls = []
+        done = threading.Event()
+        
+        def ticker():
+            while not done.is_set():
+                start = time.perf_counter()
+                time.sleep(tick)
+                stalls.append(time.perf_counter() - start - tick)
+        
+        ui = threading.Thread(target=ticker)
+        ui.start()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=queries) as sessions:
+            reports = list(sessions.map(lambda query: processor.process_query(query, tools),
+                                        ["Support tickets overview"] * queries))
+        elapsed = time.perf_counter() - start
+        done.set()
+        ui.join()
+        return reports, {
+            'seconds': round(elapsed, 3),
+            'reports_per_second': round(queries / elapsed, 2),
+            'ui_stall_p99_ms': round(float(np.percentile(stalls, 99)) * 1000, 2),
+            'ui_stall_max_ms': round(max(stalls) * 1000, 2)
+        }
+    
+    try:
+        in_thread_reports, in_thread = run(MCPQueryProcessor(manager))
+        offloaded_reports, offloaded = run(MCPQueryProcessor(manager, workers=pool))
+    finally:
+        pool.close()
+    return {
+        'benchmark': 'offload',
+        'tickets': len(manager.snapshots.current.get('zendesk')['tickets']),
+        'queries': queries,
+        'workers': workers,
+        'in_thread': in_thread,
+        'offloaded': offloaded,
+        'identical_reports': in_thread_reports == offloaded_reports
+    }
+
+
+def bench_pages(sizes=(1_000, 100_000, 1_000_000), repeat: int = 5, seed: int = 7):
+    """Paged, ranked support listings vs formatting every ticket, and the one-off rank per snapshot
+    
+    The first page is checked against a heap-based top-N over the raw records.
+    """
+    results = {'benchmark': 'pages', 'page_size': REPORT_PAGE_SIZE, 'sizes': {}, 'passed': True}
+    for size in sizes:
+        payload = generate_synthetic_data(1, seed, tickets=size)
+        manager = MCPToolManager.from_payloads(payload)
+        processor = MCPQueryProcessor(manager)
+        tool_data = {'zendesk': manager.get_tool_data('zendesk')}
+        tickets = tool_data['zendesk']['tickets']
+        
+        def full_listing():
+            lines = (label_column(tickets['priority'], TICKET_PRIORITY_EMOJI, "🟢") + " " + tickets['client'].astype(str)
+                     + ": " + tickets['subject'].astype(str) + " (" + tickets['status'].astype(str) + ")\n")
+            return "".join(lines)
+        
+        def report(page):
+            return "".join(processor._generate_support_report(['zendesk'], tool_data, page))
+        
+        records = payload['zendesk']['tickets']
+        expected = heapq.nsmallest(REPORT_PAGE_SIZE, range(len(records)), key=lambda index: (
+            TICKET_PRIORITY_RANK.get(records[index]['priority'], len(TICKET_PRIORITY_RANK)),
+            records[index]['created_at'], index))
+        matches = list(tool_data['zendesk']['tickets_rank'][:REPORT_PAGE_SIZE]) == expected
+        results['passed'] = results['passed'] and matches
+        results['sizes'][size] = {
+            'rank_ms': round(_best_of(lambda: rank_tickets(tickets), repeat) * 1000, 3),
+            'first_page_ms': round(_best_of(lambda: report(0), repeat) * 1000, 3),
+            'middle_page_ms': round(_best_of(lambda: report(size // REPORT_PAGE_SIZE // 2), repeat) * 1000, 3),
+            'full_listing_ms': round(_best_of(full_listing, 1) * 1000, 3),
+            'page_bytes': len(report(0).encode()),
+            'full_listing_bytes': len(full_listing().encode()),
+            'first_page_matches_heap': matches
+        }
+    return results
+
+
+def bench_availability(team_sizes=(100, 1_000, 5_000), days: int = 90, meetings: int = 4, queries: int = 200,
+                       scan_queries: int = 5, seed: int = 7):
+    """Free-slot and best-assignee queries on the interval index vs scanning every member's calendar
+    
+    Each member gets `meetings` random meetings per workday for `days` days;
+    queries ask for a 1-2 hour slot on a random afternoon. The scan's answers
+    must match the index's.
+    """
+    rng = np.random.default_rng(seed)
+    first_day = datetime(2025, 6, 2)
+    results = {'benchmark': 'availability', 'days': days, 'meetings_per_day': meetings, 'sizes': [], 'passed': True}
+    
+    for members in team_sizes:
+        count = members * days * meetings
+        member_ids = np.repeat(np.arange(members, dtype=np.int64), days * meetings)
+        day_minutes = np.tile(np.repeat(np.arange(days, dtype=np.int64) * 1440, meetings), members)
+        midnight = np.datetime64(first_day, 'm').astype(np.int64)
+        starts = midnight + day_minutes + 9 * 60 + rng.integers(0, 32, count) * 15
+        ends = starts + rng.choice([30, 60, 90], count)
+        names = [f"Member {index + 1}" for index in range(members)]
+        utilization = pd.Series(rng.integers(40, 101, members), index=names)
+        
+        start = time.perf_counter()
+        index = AvailabilityIndex(names, member_ids, starts, ends)
+        build_ms = (time.perf_counter() - start) * 1000
+        
+        windows = []
+        for _ in range(queries):
+            day = first_day + timedelta(days=int(rng.integers(0, days)))
+            windows.append((day + timedelta(hours=12), day + timedelta(hours=18), int(rng.choice([60, 120]))))
+        
+        start = time.perf_counter()
+        answers = [index.earliest_slots(*window) for window in windows]
+        slots_ms = (time.perf_counter() - start) * 1000 / queries
+        start = time.perf_counter()
+        for window in windows:
+            index.best_assignees(*window, utilization, 80)
+        assignees_ms = (time.perf_counter() - start) * 1000 / queries
+        
+        # Reference: every member's raw intervals, sorted and walked in Python
+        calendars = [sorted(zip(starts[member_ids == member].tolist(), ends[member_ids == member].tolist()))
+                     for member in range(members)]
+        start = time.perf_counter()
+        matches = True
+        for window, answer in zip(windows[:scan_queries], answers):
+            window_start, window_end = (int(np.datetime64(value, 'm').astype(np.int64)) for value in window[:2])
+            for member, calendar in enumerate(calendars):
+                cursor, found = window_start, -1
+                for busy_start, busy_end in calendar:
+                    if busy_end <= cursor or busy_start >= window_end:
+                        continue
+                    if busy_start - cursor >= window[2]:
+                        break
+                    cursor = max(cursor, busy_end)
+                if window_end - cursor >= window[2]:
+                    found = cursor
+                matches = matches and found == int(answer[member])
+        scan_ms = (time.perf_counter() - start) * 1000 / scan_queries
+        
+        results['passed'] = results['passed'] and matches
+        results['sizes'].append({
+            'members': members,
+            'busy_intervals': count,
+            'merged_intervals': len(index),
+            'build_ms': round(build_ms, 2),
+            'free_slots_ms_per_query': round(slots_ms, 3),
+            'best_assignees_ms_per_query': round(assignees_ms, 3),
+            'calendar_scan_ms_per_query': round(scan_ms, 3),
+            'matches_scan': matches
+        })
+    return results
+
+
+class StreamlitSession:
+    """One browser-like websocket session against a running `streamlit run`
+    
+    Sends rerun requests the way the frontend does: the triggered widget,
+    the current value of every stateful widget, the fragment the widget
+    belongs to and the hashes of messages it already has cached. Each
+    interaction returns its round-trip seconds and received payload bytes.
+    """
+    
+    def __init__(self, websocket):
+        self.websocket = websocket
+        self.widgets = {}
+        self.values = {}
+        self.cached = set()
+    
+    def _state(self, message, key, field, value):
+        widget = message.rerun_script.widget_states.widgets.add()
+        widget.id = self.widgets[key][0]
+        setattr(widget, field, value)
+    
+    async def interact(self, key: str = None, field: str = 'trigger_value', value=True):
+        """Click (or set) the widget with user key `key` and wait for the run to finish"""
+        if key is not None and field != 'trigger_value':
+            self.values[key] = (field, value)
+        message = BackMsg()
+        message.rerun_script.query_string = ''
+        message.rerun_script.cached_message_hashes.extend(self.cached)
+        for held_key, (held_field, held_value) in self.values.items():
+            if held_key in self.widgets:
+                self._state(message, held_key, held_field, held_value)
+        if key is not None:
+            if field == 'trigger_value':
+                self._state(message, key, field, value)
+            message.rerun_script.fragment_id = self.widgets[key][1]
+        
+        start = time.perf_counter()
+        await self.websocket.send(message.SerializeToString())
+        received, finished = 0, False
+        while True:
+            raw = await self.websocket.recv()
+            received += len(raw)
+            forward = ForwardMsg()
+            forward.ParseFromString(raw)
+            kind = forward.WhichOneof('type')
+            if forward.metadata.cacheable:
+                self.cached.add(forward.hash)
+            if kind == 'delta' and forward.delta.WhichOneof('type') == 'new_element':
+                element = forward.delta.new_element
+                widget = getattr(element, element.WhichOneof('type'))
+                widget_id = getattr(widget, 'id', '')
+                if widget_id.startswith('$$ID-'):
+                    self.widgets[widget_id.rsplit('-', 1)[1]] = (widget_id, forward.delta.fragment_id)
+            # A run cut short by st.rerun() is followed by the run that replaces it
+            finished = finished or (kind == 'script_finished'
+                                    and forward.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN)
+            if finished and kind == 'session_status_changed' and not forward.session_status_changed.script_is_running:
+                return time.perf_counter() - start, received
+
+
+def bench_ui(script: str = 'MCP.py', rounds: int = 20, tools=('asana', 'zendesk', 'quickbooks', 'google_analytics')):
+    """Round-trip time and websocket bytes per UI interaction on a live `streamlit run` session
+    
+    Starts the app headless with throwaway history and metric stores,
+    connects `tools`, asks enough quick-action queries to page the history,
+    then times connecting/disconnecting a tool, paging the history and
+    flipping the timing toggle. Point `script` at an older checkout's MCP.py
+    to compare.
+    """
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    workdir = tempfile.mkdtemp(prefix='mcp_ui_')
+    env = dict(os.environ, MCP_HISTORY_DB=os.path.join(workdir, 'history.db'),
+               MCP_METRICS_DIR=os.path.join(workdir, 'metrics'))
+    server = subprocess.Popen([sys.executable, '-m', 'streamlit', 'run', script, '--server.headless', 'true',
+                               '--server.port', str(port), '--browser.gatherUsageStats', 'false'],
+                              env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    
+    async def drive():
+        async with connect(f"ws://127.0.0.1:{port}/_stcore/stream", origin=f"http://127.0.0.1:{port}",
+                           subprotocols=['streamlit'], compression=None, max_size=None) as websocket:
+            session = StreamlitSession(websocket)
+            first_load = await session.interact()
+            for tool_id in tools:
+                await session.interact(f"btn_{tool_id}")
+            for index in range(7):
+                await session.interact(f"quick_{index % len(QUICK_ACTIONS)}")
+            
+            samples = {'toggle_tool': [], 'history_page': [], 'perf_toggle': []}
+            for round_index in range(rounds):
+                samples['toggle_tool'].append(await session.interact(f"btn_{tools[round_index % len(tools)]}"))
+                samples['toggle_tool'].append(await session.interact(f"btn_{tools[round_index % len(tools)]}"))
+                samples['history_page'].append(await session.interact('history_page', 'int_value', 2 - round_index % 2))
+                samples['perf_toggle'].append(await session.interact('perf_recording', 'bool_value',
+                                                                     round_index % 2 == 1))
+            return first_load, samples
+    
+    try:
+        for _ in range(150):
+            try:
+                urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1)
+                break
+            except OSError:
+                time.sleep(0.2)
+        first_load, samples = asyncio.run(drive())
+    finally:
+        server.terminate()
+        server.wait()
+    
+    results = {'benchmark': 'ui', 'script': script, 'rounds': rounds,
+               'first_load': {'ms': round(first_load[0] * 1000, 1), 'bytes': first_load[1]}, 'interactions': {}}
+    for name, runs in samples.items():
+        seconds = np.array([run[0] for run in runs]) * 1000
+        sizes = np.array([run[1] for run in runs])
+        results['interactions'][name] = {
+            'p50_ms': round(float(np.percentile(seconds, 50)), 1),
+            'p95_ms': round(float(np.percentile(seconds, 95)), 1),
+            'mean_bytes': int(sizes.mean())
+        }
+    return results
+
+
+def _rss_bytes() -> int:
+    """Current resident set size; falls back to the lifetime peak where /proc is missing"""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+
+
+# AppTest swaps a process-wide mock Runtime and config in and out around every
+# run, so two runs may not overlap
+_APP_TEST_LOCK = threading.Lock()
+
+
+def _user_flow(rng: random.Random, tools: int, quick_actions: int, custom_queries: int, think: float,
+               timeout: float):
+    """One simulated user: open the app, connect tools, click quick actions, type custom queries
+    
+    Returns (step, latency, service) seconds for every script run, where
+    latency includes waiting for other sessions' runs. The user pauses
+    `think` seconds (+-50%) between interactions. AppTest only keeps the
+    elements of the last fragment run, so after connecting tools the flow
+    reloads the page once to get the main column back.
+    """
+    app = AppTest.from_file(APP_SCRIPT, default_timeout=timeout)
+    timings = []
+    
+    def step(name, action):
+        if timings and think:
+            time.sleep(think * rng.uniform(0.5, 1.5))
+        queued = time.perf_counter()
+        with _APP_TEST_LOCK:
+            start = time.perf_counter()
+            action()
+            finish = time.perf_counter()
+        timings.append((name, finish - queued, finish - start))
+        if app.exception:
+            raise RuntimeError(f"{name}: {app.exception[0].message}")
+    
+    step('load', app.run)
+    tool_ids = [button.key[len('btn_'):] for button in app.button if button.key and button.key.startswith('btn_')]
+    for tool_id in rng.sample(tool_ids, min(tools, len(tool_ids))):
+        step('connect', lambda: app.button(key=f"btn_{tool_id}").click().run())
+    step('reload', app.run)
+    for _ in range(quick_actions):
+        step('quick_action', lambda: app.button(key=f"quick_{rng.randrange(len(QUICK_ACTIONS))}").click().run())
+    for _ in range(custom_queries):
+        query = rng.choice(CUSTOM_QUERIES)
+        ask = next(button for button in app.button if button.label == "🚀 Ask AI")
+        step('custom_query', lambda: (app.text_input[0].input(query), ask.click().run()))
+    return timings
+
+
+# The load knee: the first level where the runner is this busy, or where adding
+# sessions raised throughput by less than this fraction of the previous level
+KNEE_UTILIZATION = 0.95
+KNEE_MIN_GROWTH = 0.10
+
+
+def bench_load(session_counts=(1, 2, 4, 8, 16, 32), tools: int = 4, quick_actions: int = 5, custom_queries: int = 2,
+               think: float = 1.0, timeout: float = 120.0, seed: int = 7):
+    """Script-run latency, throughput and peak RSS as AppTest sessions on one serialized runner grow
+    
+    Every session runs the user flow on its own thread in this process and
+    shares the cached tool manager, but AppTest can only run one script at
+    a time, so runs queue behind each other. That matches CPU-bound runs
+    behind the GIL; anything that waits inside a run (I/O, sleeps) would
+    overlap on a real server but blocks every session here. Read the levels
+    as the throughput ceiling of a single runner, not as where `streamlit
+    run` saturates; the reported `knee` is where that runner stops scaling.
+    """
+    workdir = tempfile.mkdtemp(prefix='mcp_load_')
+    os.environ.setdefault('MCP_HISTORY_DB', os.path.join(workdir, 'history.db'))
+    os.environ.setdefault('MCP_METRICS_DIR', os.path.join(workdir, 'metrics'))
+    # Warm the shared managers so the first level doesn't pay for start-up alone
+    _user_flow(random.Random(seed), tools, 1, 0, 0, timeout)
+    
+    results = {'benchmark': 'load', 'flow': {'tools': tools, 'quick_actions': quick_actions,
+                                             'custom_queries': custom_queries, 'think_seconds': think},
+               'runner': 'single serialized AppTest runner', 'levels': []}
+    for sessions in session_counts:
+        peak = [_rss_bytes()]
+        done = threading.Event()
+        
+        def sample_rss():
+            while not done.wait(0.05):
+                peak[0] = max(peak[0], _rss_bytes())
+        
+        sampler = threading.Thread(target=sample_rss, daemon=True)
+        sampler.start()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=sessions) as pool:
+            flows = list(pool.map(lambda index: _user_flow(random.Random(seed + index), tools, quick_actions,
+                                                           custom_queries, think, timeout), range(sessions)))
+        elapsed = time.perf_counter() - start
+        done.set()
+        sampler.join()
+        
+        runs = [run for flow in flows for run in flow]
+        seconds = np.array([run[1] for run in runs]) * 1000
+        busy = sum(run[2] for run in runs)
+        by_step = {}
+        for name, duration, _ in runs:
+            by_step.setdefault(name, []).append(duration * 1000)
+        level = {
+            'sessions': sessions,
+            'script_runs': len(runs),
+            'seconds': round(elapsed, 2),
+            'runs_per_second': round(len(runs) / elapsed, 2),
+            'p50_ms': round(float(np.percentile(seconds, 50)), 1),
+            'p95_ms': round(float(np.percentile(seconds, 95)), 1),
+            'p99_ms': round(float(np.percentile(seconds, 99)), 1),
+            'service_p50_ms': round(float(np.percentile([run[2] for run in runs], 50)) * 1000, 1),
+            'utilization': round(busy / elapsed, 2),
+            'step_p50_ms': {name: round(float(np.percentile(values, 50)), 1) for name, values in by_step.items()},
+            'peak_rss_mb': round(peak[0] / 2**20, 1)
+        }
+        results['levels'].append(level)
+    
+    results['knee'] = None
+    for previous, level in zip([None] + results['levels'], results['levels']):
+        if level['utilization'] >= KNEE_UTILIZATION:
+            results['knee'] = {'sessions': level['sessions'], 'reason': f"utilization {level['utilization']:.2f}"}
+        elif previous is not None and level['runs_per_second'] < previous['runs_per_second'] * (1 + KNEE_MIN_GROWTH):
+            growth = level['runs_per_second'] / previous['runs_per_second'] - 1
+            results['knee'] = {'sessions': level['sessions'], 'reason': f"throughput grew {growth:+.0%}"}
+        if results['knee'] is not None:
+            results['knee']['caveat'] = "single serialized AppTest runner, not `streamlit run`"
+            break
+    return results
+
+
+def _best_of(case, repeat: int, min_sample_seconds: float = 0.01) -> float:
+    """Seconds per call: loop the case for at least `min_sample_seconds` per sample (GC off), keep the best sample"""
+    timer = timeit.Timer(case)
+    number = 1
+    while timer.timeit(number) < min_sample_seconds:
+        number *= 2
+    return min(timer.repeat(repeat, number)) / number
+
+
+def bench_suite(scales=(1, 1_000, 20_000), repeat: int = 5, seed: int = 7):
+    """Routing, every report builder, full queries and dashboard prep on synthetic data at several scales"""
+    results = {'benchmark': 'suite', 'repeat': repeat, 'seed': seed, 'timings_ms': {}}
+    
+    for scale in scales:
+        manager = MCPToolManager.from_payloads(generate_synthetic_data(scale, seed))
+        manager.reports = ReportCache(max_entries=0)
+        processor = MCPQueryProcessor(manager)
+        tools = list(manager.tools)
+        tool_data = {tool_id: manager.get_tool_data(tool_id) for tool_id in tools}
+        
+        cases = {'routing': lambda: [processor.router.route(query) for query in QUICK_ACTIONS]}
+        for intent, builder in processor.builders.items():
+            cases[f'generate_{intent}'] = lambda builder=builder: ''.join(builder(tools, tool_data))
+        for index, query in enumerate(QUICK_ACTIONS):
+            cases[f'process_query_{index}'] = lambda query=query: processor.process_query(query, tools)
+        
+        def dashboard_prep():
+            totals = manager.aggregates.view()
+            return [dashboard_panel(tool_id, manager.get_tool_data(tool_id), totals) for tool_id in tools]
+        cases['dashboard_prep'] = dashboard_prep
+        
+        for name, case in cases.items():
+            results['timings_ms'][f'scale={scale}/{name}'] = round(_best_of(case, repeat) * 1000, 4)
+    return results
+
+
+def compare_to_baseline(results, baseline, tolerance: float = 0.5, noise_ms: float = 0.25):
+    """Flag timings that got slower than the baseline by more than `tolerance`"""
+    regressions = []
+    for name, current in results['timings_ms'].items():
+        previous = baseline.get('timings_ms', {}).get(name)
+        if previous is not None and current > previous * (1 + tolerance) and current - previous > noise_ms:
+            regressions.append({'case': name, 'baseline_ms': previous, 'current_ms': current,
+                                'slowdown': round(current / previous, 2) if previous else None})
+    results['baseline_tolerance'] = tolerance
+    results['regressions'] = regressions
+    return results
+
+
+def run_suite(args):
+    results = bench_suite(tuple(args.scales), args.repeat)
+    if args.baseline:
+        with open(args.baseline) as baseline:
+            compare_to_baseline(results, json.load(baseline), args.tolerance)
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as baseline:
+            json.dump(results, baseline, indent=2)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='benchmark', required=True)
+    
+    connectors = commands.add_parser('connectors', help=bench_connectors.__doc__)
+    connectors.add_argument('--scale', type=int, default=100)
+    connectors.add_argument('--clients', type=int, default=8)
+    connectors.add_argument('--rounds', type=int, default=50)
+    connectors.set_defaults(run=lambda args: bench_connectors(args.scale, args.clients, args.rounds))
+    
+    snapshot = commands.add_parser('snapshot', help=bench_snapshot.__doc__)
+    snapshot.add_argument('--sessions', type=int, default=200)
+    snapshot.add_argument('--reruns', type=int, default=20)
+    snapshot.set_defaults(run=lambda args: bench_snapshot(args.sessions, args.reruns))
+    
+    routing = commands.add_parser('routing', help=bench_routing.__doc__)
+    routing.add_argument('--sizes', type=int, nargs='+', default=[100, 10_000, 1_000_000])
+    routing.add_argument('--queries', type=int, default=2000)
+    routing.set_defaults(run=lambda args: bench_routing(tuple(args.sizes), queries=args.queries))
+    
+    aggregates = commands.add_parser('aggregates', help=bench_aggregates.__doc__)
+    aggregates.add_argument('--sizes', type=int, nargs='+', default=[10_000, 1_000_000, 10_000_000])
+    aggregates.add_argument('--loop-limit', type=int, default=1_000_000)
+    aggregates.set_defaults(run=lambda args: bench_aggregates(tuple(args.sizes), args.loop_limit))
+    
+    event_replay = commands.add_parser('events', help=bench_events.__doc__)
+    event_replay.add_argument('--events', type=int, default=2_000_000)
+    event_replay.set_defaults(run=lambda args: bench_events(args.events))
+    
+    headless = commands.add_parser('headless', help=bench_headless.__doc__)
+    headless.add_argument('--clients', type=int, default=16)
+    headless.add_argument('--requests', type=int, default=500)
+    headless.set_defaults(run=lambda args: bench_headless(args.clients, args.requests))
+    
+    metrics = commands.add_parser('metrics', help=bench_metrics.__doc__)
+    metrics.add_argument('--years', type=int, default=3)
+    metrics.add_argument('--chunk-days', type=int, default=1)
+    metrics.set_defaults(run=lambda args: bench_metrics(args.years, args.chunk_days))
+    
+    charts = commands.add_parser('charts', help=bench_charts.__doc__.splitlines()[0])
+    charts.add_argument('--sizes', type=int, nargs='+', default=[10_000, 1_000_000, 10_000_000])
+    charts.add_argument('--points', type=int, default=CHART_POINTS)
+    charts.add_argument('--raw-limit', type=int, default=1_000_000)
+    charts.set_defaults(run=lambda args: bench_charts(tuple(args.sizes), args.points, args.raw_limit))
+    
+    stampede = commands.add_parser('stampede', help=bench_stampede.__doc__.splitlines()[0])
+    stampede.add_argument('--sessions', type=int, default=500)
+    stampede.add_argument('--latency', type=float, default=0.05)
+    stampede.set_defaults(run=lambda args: bench_stampede(args.sessions, args.latency))
+    
+    deadlines = commands.add_parser('deadlines', help=bench_deadlines.__doc__.splitlines()[0])
+    deadlines.add_argument('--latency', type=float, default=0.02)
+    deadlines.add_argument('--slow', type=float, default=0.5, help="extra seconds the slow tool takes")
+    deadlines.add_argument('--deadline', type=float, default=0.2)
+    deadlines.set_defaults(run=lambda args: bench_deadlines(args.latency, args.slow, args.deadline))
+    
+    offload = commands.add_parser('offload', help=bench_offload.__doc__.splitlines()[0])
+    offload.add_argument('--scale', type=int, default=50_000)
+    offload.add_argument('--queries', type=int, default=8)
+    offload.add_argument('--workers', type=int)
+    offload.set_defaults(run=lambda args: bench_offload(args.scale, args.queries, args.workers))
+    
+    pages = commands.add_parser('pages', help=bench_pages.__doc__.splitlines()[0])
+    pages.add_argument('--sizes', type=int, nargs='+', default=[1_000, 100_000, 1_000_000])
+    pages.set_defaults(run=lambda args: bench_pages(tuple(args.sizes)))
+    
+    availability = commands.add_parser('availability', help=bench_availability.__doc__.splitlines()[0])
+    availability.add_argument('--members', type=int, nargs='+', default=[100, 1_000, 5_000])
+    availability.add_argument('--days', type=int, default=90)
+    availability.add_argument('--meetings', type=int, default=4)
+    availability.set_defaults(run=lambda args: bench_availability(tuple(args.members), args.days, args.meetings))
+    
+    ui = commands.add_parser('ui', help=bench_ui.__doc__.splitlines()[0])
+    ui.add_argument('--script', default='MCP.py', help="app to serve, e.g. an older checkout's MCP.py")
+    ui.add_argument('--rounds', type=int, default=20)
+    ui.set_defaults(run=lambda args: bench_ui(args.script, args.rounds))
+    
+    load = commands.add_parser('load', help=bench_load.__doc__.splitlines()[0])
+    load.add_argument('--sessions', type=int, nargs='+', default=[1, 2, 4, 8, 16, 32])
+    load.add_argument('--tools', type=int, default=4)
+    load.add_argument('--quick-actions', type=int, default=5)
+    load.add_argument('--custom-queries', type=int, default=2)
+    load.add_argument('--think', type=float, default=1.0, help='seconds a user pauses between interactions')
+    load.set_defaults(run=lambda args: bench_load(tuple(args.sessions), args.tools, args.quick_actions,
+                                                  args.custom_queries, args.think))
+    
+    suite = commands.add_parser('suite', help=bench_suite.__doc__)
+    suite.add_argument('--scales', type=int, nargs='+', default=[1, 1_000, 20_000])
+    suite.add_argument('--repeat', type=int, default=5)
+    suite.add_argument('--baseline', help="JSON from an earlier run to compare against")
+    suite.add_argument('--tolerance', type=float, default=0.5, help="allowed slowdown before flagging, as a fraction")
+    suite.add_argument('--save-baseline', help="write this run's results as the new baseline")
+    suite.set_defaults(run=run_suite)
+    
+    args = parser.parse_args()
+    results = args.run(args)
+    print(json.dumps(results))
+    if results.get('regressions') or results.get('passed') is False:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()